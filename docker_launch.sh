@@ -97,7 +97,7 @@ elif [ "$mode" == "stop" ]; then
   echo "Stopping containers by name..."
   
   # Stop and remove specific containers
-  for container_name in "media-graph-rabbitmq" "media-graph-redis" "media-graph-api" "media-graph-celery-worker"; do
+  for container_name in "media-graph-rabbitmq" "media-graph-redis" "media-graph-api" "media-graph-celery-worker" "media-graph-celery-retrieval-worker"; do
     if docker ps -q -f name=$container_name | grep -q .; then
       echo "Stopping $container_name..."
       docker stop $container_name 2>/dev/null || true
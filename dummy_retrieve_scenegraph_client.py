@@ -4,10 +4,48 @@ Retrieve-Scenegraph API를 테스트하는 클라이언트
 사용자 질문을 입력받아 triples로 변환하고 검색을 수행하는 API 테스트
 """
 
+import asyncio
+import io
+import sys
+from collections import namedtuple
 import httpx
 import time
 import json
+import logging
 import os
+import orjson
+
+from src.contents_graph.task_status import TaskStatusCode, FINISHED_STATUS_CODES
+
+BASE_URL = "http://localhost:10105"
+
+LOGGER = logging.getLogger(__name__)
+
+def create_client():
+    """작업 제출과 상태 폴링 전체에서 재사용하는 비동기 HTTP 클라이언트 (keep-alive 커넥션 풀)"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        headers={'Accept': 'application/json'},
+        timeout=httpx.Timeout(15.0),
+        limits=httpx.Limits(keepalive_expiry=5.0)  # 서버 측 keep-alive 종료 전에 유휴 커넥션을 정리
+    )
+
+def retry_after_hint(response):
+    """상태 응답의 X-Retry-After 헤더(초)를 읽음 (없거나 잘못된 값이면 None)"""
+    value = response.headers.get('X-Retry-After')
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+# 상태 폴링 백오프 배율 (initial_interval부터 max_interval까지 증가)
+BACKOFF_FACTOR = 1.25
+
+
+# 검색 결과 한 건의 구조
+# rank: 순위, score: 전체 유사도 점수, detail: 세부 점수 리스트 [[0, 전체, 텍스트, 시각, 그래프, [ID들]]]
+# title: 작품명, path: 파일 경로, extra: 추가 정보 (title 이후는 없을 수 있음)
+Hit = namedtuple('Hit', 'rank score detail title path extra', defaults=(None, None, None, None))
 
 
 def format_search_results(search_results):
@@ -21,188 +59,278 @@ def format_search_results(search_results):
         print("📊 검색 결과가 없습니다.")
         return
     
-    print(f"\n🔍 검색 결과 ({len(search_results)}개):")
-    print("=" * 80)
+    # 결과 전체를 버퍼에 모았다가 한 번에 출력
+    buf = io.StringIO()
+    print(f"\n🔍 검색 결과 ({len(search_results)}개):", file=buf)
+    print("=" * 80, file=buf)
     
-    for i, result in enumerate(search_results, 1):
-        print(f"\n📌 결과 #{i}")
-        print("-" * 40)
-        
-        # 실제 데이터 구조에 맞게 수정
-        # result[0]: 순위 (1)
-        # result[1]: 전체 유사도 점수
-        # result[2]: 세부 점수 리스트 [[0, 전체, 텍스트, 시각, 그래프, [ID들]]]
-        # result[3]: 작품명
-        # result[4]: 파일 경로
-        # result[5]: 추가 정보
-        
-        rank = result[0]
-        similarity_score = result[1]
-        print(f"🏆 순위: {rank}")
-        print(f"📊 전체 유사도 점수: {similarity_score:.4f}")
+    hits = [Hit(*result[:len(Hit._fields)]) for result in search_results]
+    for i, hit in enumerate(hits, 1):
+        print(f"\n📌 결과 #{i}", file=buf)
+        print("-" * 40, file=buf)
+        print(f"🏆 순위: {hit.rank}", file=buf)
+        print(f"📊 전체 유사도 점수: {hit.score:.4f}", file=buf)
         
-        # 세부 점수 정보
-        detailed_scores = result[2]
-        if detailed_scores and len(detailed_scores) > 0:
-            score_detail = detailed_scores[0]  # 첫 번째 세부 점수
-            if len(score_detail) >= 5:
-                print(f"📈 세부 점수:")
-                print(f"   - 전체 유사도: {score_detail[1]:.4f}")
-                print(f"   - 텍스트 유사도: {score_detail[2]:.4f}")
-                print(f"   - 시각적 유사도: {score_detail[3]:.4f}")
-                print(f"   - 그래프 유사도: {score_detail[4]:.4f}")
+        # 세부 점수 정보 (첫 번째 세부 점수만 출력)
+        if hit.detail:
+            try:
+                _, total, text, visual, graph, *ids = hit.detail[0]
+            except ValueError:
+                pass
+            else:
+                print(f"📈 세부 점수:", file=buf)
+                print(f"   - 전체 유사도: {total:.4f}", file=buf)
+                print(f"   - 텍스트 유사도: {text:.4f}", file=buf)
+                print(f"   - 시각적 유사도: {visual:.4f}", file=buf)
+                print(f"   - 그래프 유사도: {graph:.4f}", file=buf)
                 
                 # ID 정보가 있다면 출력
-                if len(score_detail) > 5 and score_detail[5]:
-                    print(f"   - 관련 ID: {score_detail[5]}")
+                if ids and ids[0]:
+                    print(f"   - 관련 ID: {ids[0]}", file=buf)
         
         # 메타데이터
-        if len(result) >= 5:
-            print(f"📺 작품명: {result[3]}")
-            print(f"📁 파일 경로: {result[4]}")
+        if hit.path is not None:
+            print(f"📺 작품명: {hit.title}", file=buf)
+            print(f"📁 파일 경로: {hit.path}", file=buf)
         
         # 추가 정보
-        if len(result) >= 6:
-            print(f"🔢 추가 정보: {result[5]}")
+        if hit.extra is not None:
+            print(f"🔢 추가 정보: {hit.extra}", file=buf)
+    
+    sys.stdout.write(buf.getvalue())
+    sys.stdout.flush()
 
 
-def wait_for_task_completion(base_url, jobid, max_wait_time=300, check_interval=2):
+async def wait_for_task_events(client, jobid, max_wait_time=300):
+    """
+    SSE 이벤트 스트림(/events)으로 작업이 종료 상태에 도달할 때까지 대기합니다.
+    스트림을 사용할 수 없거나 종료 상태 없이 끊기면 예외를 발생시켜 폴링으로 대체하게 합니다.
+    
+    Args:
+        client (httpx.AsyncClient): 서버 base_url이 설정된 HTTP 클라이언트
+        jobid (str): 작업 ID
+        max_wait_time (int): 최대 대기 시간 (초)
+    
+    Returns:
+        int: 종료 상태 코드 (202/203/204)
+    """
+    LOGGER.info("📡 GET /api/v1/retrieve-scenegraph/%s/events - 상태 이벤트 구독 중...", jobid)
+    
+    timeout = httpx.Timeout(15.0, read=max_wait_time)
+    async with client.stream("GET", f"/api/v1/retrieve-scenegraph/{jobid}/events", timeout=timeout) as response:
+        response.raise_for_status()
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            
+            event = orjson.loads(line[5:])
+            current_status = event.get('status')
+            LOGGER.debug("📊 현재 상태: %s, 진행률: %s%%", current_status, event.get('progress', 0))
+            
+            if current_status in FINISHED_STATUS_CODES:
+                return current_status
+    
+    raise ConnectionError("이벤트 스트림이 종료 상태 없이 끊어졌습니다.")
+
+
+async def wait_for_task_completion(client, jobid, max_wait_time=300, initial_interval=0.3, max_interval=3.0, long_poll_wait=10):
     """
     작업이 완료될 때까지 주기적으로 GET API로 상태를 체크합니다.
     
     Args:
-        base_url (str): 서버 기본 URL
+        client (httpx.AsyncClient): 서버 base_url이 설정된 HTTP 클라이언트
         jobid (str): 작업 ID
         max_wait_time (int): 최대 대기 시간 (초)
-        check_interval (int): 상태 확인 간격 (초)
+        initial_interval (float): 최초 상태 확인 간격 (초), 상태가 바뀌면 이 값으로 리셋
+        max_interval (float): 지수 백오프 상한 간격 (초)
+        long_poll_wait (float): 서버가 상태 변화를 기다려 줄 최대 시간 (초, None이면 long-polling 미사용)
     
     Returns:
         dict: 작업 결과 또는 None (실패 시)
     """
-    print(f"⏳ 작업 {jobid} 상태 주기적 체크 시작...")
-    print(f"📊 체크 간격: {check_interval}초, 최대 대기: {max_wait_time}초")
+    LOGGER.info("⏳ 작업 %s 상태 주기적 체크 시작...", jobid)
+    LOGGER.info("📊 체크 간격: %s~%s초 (x%s), 최대 대기: %s초", initial_interval, max_interval, BACKOFF_FACTOR, max_wait_time)
     
     start_time = time.time()
     consecutive_errors = 0
     max_consecutive_errors = 5
     last_status = None
+    current_delay = initial_interval
+    
+    async def backoff(multiplier=1, retry_after=None):
+        nonlocal current_delay
+        # 서버가 남은 시간 힌트(X-Retry-After)를 주면 지수 백오프 대신 그 시간만큼 대기
+        delay = retry_after if retry_after is not None else current_delay * multiplier
+        await asyncio.sleep(min(delay, max_interval))
+        current_delay = min(current_delay * BACKOFF_FACTOR, max_interval)
     
     while True:
         # 최대 대기 시간 체크
         elapsed_time = time.time() - start_time
         if elapsed_time > max_wait_time:
-            print(f"❌ 최대 대기 시간({max_wait_time}초) 초과")
+            LOGGER.error("❌ 최대 대기 시간(%s초) 초과", max_wait_time)
             return None
         
         try:
-            print(f"🔄 GET /api/v1/retrieve-scenegraph/{jobid} - 상태 확인 중...")
+            LOGGER.debug("🔄 GET /api/v1/retrieve-scenegraph/%s - 상태 확인 중...", jobid)
             
             # GET API로 작업 상태 확인
-            response = httpx.get(
-                f"{base_url}/api/v1/retrieve-scenegraph/{jobid}",
-                timeout=15
-            )
+            # 직전 상태를 알고 있으면 서버에서 상태가 바뀔 때까지 대기 (long-polling)
+            params = {}
+            if long_poll_wait and last_status is not None:
+                params = {"wait": long_poll_wait, "last_status": last_status}
+            response = await client.get(f"/api/v1/retrieve-scenegraph/{jobid}", params=params)
             
             consecutive_errors = 0  # 성공 시 에러 카운터 리셋
             
             if response.status_code == 200:
-                result = response.json()
+                result = orjson.loads(response.content)
                 current_status = result.get('status')
                 progress = result.get('progress', 0)
                 
                 # 상태 변화 감지 및 출력
                 if current_status != last_status:
-                    print(f"🔄 상태 변화 감지: {last_status} → {current_status}")
+                    LOGGER.info("🔄 상태 변화 감지: %s → %s", last_status, current_status)
                     last_status = current_status
+                    current_delay = initial_interval
                 
-                print(f"📊 현재 상태: {current_status}, 진행률: {progress}%")
+                LOGGER.debug("📊 현재 상태: %s, 진행률: %s%%", current_status, progress)
                 
                 # 작업 완료 체크
-                if current_status == 202:  # TaskStatusCode.COMPLETED
-                    print(f"✅ 작업 완료! 결과 수신 중...")
+                match current_status:
+                    case TaskStatusCode.SUCCESS:
+                        LOGGER.info("✅ 작업 완료! 결과 수신 중...")
                     
-                    # 결과를 깔끔하게 포맷팅하여 출력
-                    result_data = result.get('result', {})
-                    if result_data and 'result' in result_data:
-                        first_result = result_data["result"]
-                        if 'search_results' in first_result:
-                            print(f"\n📋 질문: {first_result.get('question', 'N/A')}")
-                            print(f"🔗 추출된 트리플: {first_result.get('triples', [])}")
+                        # 결과를 깔끔하게 포맷팅하여 출력
+                        result_data = result.get('result', {})
+                        if result_data and 'result' in result_data:
+                            first_result = result_data["result"]
+                            if 'search_results' in first_result:
+                                LOGGER.info("\n📋 질문: %s", first_result.get('question', 'N/A'))
+                                LOGGER.info("🔗 추출된 트리플: %s", first_result.get('triples', []))
                             
-                            # search_results를 깔끔하게 포맷팅
-                            search_results = first_result.get('search_results', [])
-                            print(f"🔍 검색된 결과 수: {len(search_results)}개")
-                            format_search_results(search_results)
+                                # search_results를 깔끔하게 포맷팅
+                                search_results = first_result.get('search_results', [])
+                                LOGGER.info("🔍 검색된 결과 수: %s개", len(search_results))
+                                format_search_results(search_results)
+                            else:
+                                LOGGER.info("📋 최종 결과: %s", result_data)
                         else:
-                            print(f"📋 최종 결과: {result_data}")
-                    else:
-                        print(f"📋 최종 결과: {result_data}")
+                            LOGGER.info("📋 최종 결과: %s", result_data)
                     
-                    return result
+                        return result
                     
-                elif current_status == 203:  # TaskStatusCode.FAILED
-                    print(f"❌ 작업 실패: {result.get('message', 'Unknown error')}")
-                    return None
+                    case TaskStatusCode.FAILURE:
+                        LOGGER.error("❌ 작업 실패: %s", result.get('message', 'Unknown error'))
+                        return None
                     
-                elif current_status == 204:  # TaskStatusCode.CANCELLED
-                    print(f"❌ 작업 취소됨: {result.get('message', 'Task cancelled')}")
-                    return None
+                    case TaskStatusCode.REVOKED:
+                        LOGGER.error("❌ 작업 취소됨: %s", result.get('message', 'Task cancelled'))
+                        return None
                     
-                elif current_status == 200:  # TaskStatusCode.PENDING
-                    print(f"⏳ 작업 대기 중... (PENDING)")
-                    time.sleep(check_interval)
+                    case TaskStatusCode.PENDING:
+                        LOGGER.debug("⏳ 작업 대기 중... (PENDING)")
+                        if not long_poll_wait:
+                            await backoff(retry_after=retry_after_hint(response))
                     
-                elif current_status == 201:  # TaskStatusCode.RUNNING
-                    print(f"⚡ 작업 실행 중... (RUNNING) - {progress}% 완료")
-                    time.sleep(check_interval)
+                    case TaskStatusCode.PROGRESS:
+                        LOGGER.debug("⚡ 작업 실행 중... (RUNNING) - %s%% 완료", progress)
+                        if not long_poll_wait:
+                            await backoff(retry_after=retry_after_hint(response))
                     
-                else:
-                    print(f"❓ 알 수 없는 상태: {current_status}")
-                    time.sleep(check_interval)
+                    case _:
+                        LOGGER.warning("❓ 알 수 없는 상태: %s", current_status)
+                        await backoff()
                     
             elif response.status_code == 404:
-                print(f"⚠️ 작업 {jobid}을 찾을 수 없습니다. 잠시 후 다시 시도합니다.")
-                time.sleep(check_interval * 2)
+                LOGGER.warning("⚠️ 작업 %s을 찾을 수 없습니다. 잠시 후 다시 시도합니다.", jobid)
+                await backoff(2)
                 
             else:
-                print(f"❌ 상태 확인 실패: {response.status_code} - {response.text}")
-                time.sleep(check_interval)
+                LOGGER.error("❌ 상태 확인 실패: %s - %s", response.status_code, response.text)
+                await backoff()
                 
         except httpx.TimeoutException:
             consecutive_errors += 1
-            print(f"⏰ GET 요청 타임아웃 (연속 {consecutive_errors}/{max_consecutive_errors})")
+            LOGGER.warning("⏰ GET 요청 타임아웃 (연속 %s/%s)", consecutive_errors, max_consecutive_errors)
             
             if consecutive_errors >= max_consecutive_errors:
-                print("❌ 연속 타임아웃 에러가 너무 많습니다. 작업을 중단합니다.")
+                LOGGER.error("❌ 연속 타임아웃 에러가 너무 많습니다. 작업을 중단합니다.")
                 return None
                 
-            time.sleep(check_interval * 2)
+            await backoff(2)
             
         except httpx.ConnectError:
             consecutive_errors += 1
-            print(f"🔌 GET 요청 연결 오류 (연속 {consecutive_errors}/{max_consecutive_errors})")
+            LOGGER.warning("🔌 GET 요청 연결 오류 (연속 %s/%s)", consecutive_errors, max_consecutive_errors)
             
             if consecutive_errors >= max_consecutive_errors:
-                print("❌ 연속 연결 에러가 너무 많습니다. 작업을 중단합니다.")
+                LOGGER.error("❌ 연속 연결 에러가 너무 많습니다. 작업을 중단합니다.")
                 return None
                 
-            time.sleep(check_interval * 2)
+            await backoff(2)
             
         except Exception as e:
             consecutive_errors += 1
-            print(f"❌ GET 요청 중 예상치 못한 오류: {e} (연속 {consecutive_errors}/{max_consecutive_errors})")
+            LOGGER.error("❌ GET 요청 중 예상치 못한 오류: %s (연속 %s/%s)", e, consecutive_errors, max_consecutive_errors)
             
             if consecutive_errors >= max_consecutive_errors:
-                print("❌ 연속 에러가 너무 많습니다. 작업을 중단합니다.")
+                LOGGER.error("❌ 연속 에러가 너무 많습니다. 작업을 중단합니다.")
                 return None
                 
-            time.sleep(check_interval)
+            await backoff()
 
 
-def test_retrieve_scenegraph_question(question="남녀가 키스하는 장면을 찾아줘.", tau=0.30, top_k=5):
-    """직접 질문을 입력하여 retrieve-scenegraph API 테스트"""
-    base_url = "http://localhost:10105"
+async def wait_for_all(client, jobids, max_wait_time=300, initial_interval=0.3, max_interval=3.0):
+    """
+    여러 작업이 모두 종료될 때까지 일괄 상태 조회 API(POST /status) 한 번으로 함께 체크합니다.
+    
+    Args:
+        client (httpx.AsyncClient): 서버 base_url이 설정된 HTTP 클라이언트
+        jobids (list): 작업 ID 리스트
+        max_wait_time (int): 최대 대기 시간 (초)
+        initial_interval (float): 최초 상태 확인 간격 (초), 어떤 작업이든 종료되면 이 값으로 리셋
+        max_interval (float): 지수 백오프 상한 간격 (초)
+    
+    Returns:
+        dict: 작업 ID별 최종 응답 (완료되지 못한 작업은 None)
+    """
+    LOGGER.info("⏳ 작업 %s개 상태 일괄 체크 시작...", len(jobids))
+    
+    start_time = time.time()
+    pending = list(jobids)
+    results = {jobid: None for jobid in jobids}
+    current_delay = initial_interval
     
+    while pending and time.time() - start_time <= max_wait_time:
+        try:
+            response = await client.post(f"/api/v1/retrieve-scenegraph/status", json={"jobids": pending})
+            response.raise_for_status()
+        except httpx.HTTPError as e:
+            LOGGER.error("❌ 일괄 상태 확인 실패: %s", e)
+        else:
+            # 404(작업 없음)도 더 기다릴 필요가 없으므로 종료로 취급
+            finished = [item for item in orjson.loads(response.content) if item.get('status') in (*FINISHED_STATUS_CODES, 404)]
+            for item in finished:
+                results[item['jobid']] = item
+                pending.remove(item['jobid'])
+            
+            if finished:
+                LOGGER.info("📊 완료 %s/%s", len(jobids) - len(pending), len(jobids))
+                current_delay = initial_interval
+                continue
+        
+        await asyncio.sleep(current_delay)
+        current_delay = min(current_delay * BACKOFF_FACTOR, max_interval)
+    
+    if pending:
+        LOGGER.error("❌ 최대 대기 시간(%s초) 초과, 미완료 작업: %s", max_wait_time, pending)
+    return results
+
+
+async def test_retrieve_scenegraph_question(client, question="남녀가 키스하는 장면을 찾아줘.", tau=0.30, top_k=5):
+    """직접 질문을 입력하여 retrieve-scenegraph API 테스트"""
     print(f"\n🔧 Retrieve-Scenegraph API Test - Direct Question")
     print("=" * 50)
     print(f"📝 질문: {question}")
@@ -221,22 +349,15 @@ def test_retrieve_scenegraph_question(question="남녀가 키스하는 장면을
     try:
         print("🔄 1단계: 작업 요청 (POST)")
         
-        session = httpx.Client()
-        session.headers.update({
-            'Content-Type': 'application/json',
-            'Accept': 'application/json',
-            'Connection': 'close'
-        })
-        
-        response = session.post(
-            f"{base_url}/api/v1/retrieve-scenegraph", 
+        # 상태 폴링과 같은 클라이언트(커넥션 풀)를 공유
+        response = await client.post(
+            "/api/v1/retrieve-scenegraph",
             json=request_data,
-            timeout=10,
-            headers={'Connection': 'close'}
+            timeout=10  # POST 요청은 빠르게 응답받아야 함
         )
         
         if response.status_code == 200:
-            result = response.json()
+            result = orjson.loads(response.content)
             jobid = result.get('jobid')
             print(f"✅ 작업 요청 성공!")
             print(f"📋 작업 ID: {jobid}")
@@ -245,7 +366,13 @@ def test_retrieve_scenegraph_question(question="남녀가 키스하는 장면을
             
             if jobid:
                 print("🔄 2단계: 작업 상태 주기적 체크 (GET)")
-                final_result = wait_for_task_completion(base_url, jobid)
+                try:
+                    await wait_for_task_events(client, jobid)
+                except (httpx.HTTPError, ConnectionError) as e:
+                    print(f"⚠️ 이벤트 스트림 사용 불가 ({e}), 상태 폴링으로 대체합니다.")
+                
+                # 종료 상태의 최종 결과는 기존 GET으로 조회 (SSE 미지원 시 폴링)
+                final_result = await wait_for_task_completion(client, jobid)
                 if final_result:
                     print("🎉 전체 테스트 완료!")
                     return True
@@ -273,17 +400,26 @@ def test_retrieve_scenegraph_question(question="남녀가 키스하는 장면을
         return False
 
 
+async def main():
+    """AsyncClient 하나로 작업 제출(POST)과 상태 폴링(GET)의 커넥션을 함께 재사용"""
+    async with create_client() as client:
+        # 1. 기본 질문으로 테스트
+        print("\n" + "="*50)
+        print("📝 Test 1: 기본 질문 테스트")
+        print("="*50)
+        await test_retrieve_scenegraph_question(client, "남녀가 키스하는 장면을 찾아줘.", 0.30, 5)
+
+
 if __name__ == "__main__":
     import sys
     
+    # LOG_LEVEL=WARNING 등으로 폴링 로그를 줄일 수 있음
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s")
+    
     print("🚀 Starting Retrieve-Scenegraph API Tests...")
     print("Make sure the server is running on http://localhost:10105")
     print("=" * 60)
     
-    # 1. 기본 질문으로 테스트
-    print("\n" + "="*50)
-    print("📝 Test 1: 기본 질문 테스트")
-    print("="*50)
-    test_retrieve_scenegraph_question("남녀가 키스하는 장면을 찾아줘.", 0.30, 5)
+    asyncio.run(main())
     
     print("\n✨ All tests completed!")
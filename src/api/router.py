@@ -1,60 +1,256 @@
 import logger_init
 import asyncio
 import time
-from fastapi import Request, APIRouter, HTTPException
-from starlette.concurrency import iterate_in_threadpool
+import orjson
+from contextlib import aclosing
+from typing import List, Optional
+from fastapi import Request, APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.datastructures import URL
+from starlette_context import context
+from pydantic import TypeAdapter, ValidationError
 from .schema import AnalyzeRequest, StatusResponse, BaseResponse
 from .schema import MetaToSceneGraphRequest, Meta2GraphStatusResponse
 from .schema import RetrivalGraphRequest, RetrivalGraphStatusResponse
-from contents_graph.task_manager import task_manager, TaskStatus, TaskStatusCode 
+from .schema import TaskStatusBatchRequest
+from contents_graph.utils import load_config
+from contents_graph.task_manager import task_manager, TaskStatus, TaskStatusCode, TaskState, FINISHED_STATUSES
 
 base_url='api'
 main_router_url = f"/{base_url}"
 
 GRAPH_ROUTER = APIRouter (
-    prefix=main_router_url
+    prefix=main_router_url,
+    default_response_class=ORJSONResponse
 )
 
+LOGGER = logger_init.get_logger()
+
 ### Print request, response log ###
-async def request_logger(request: Request, call_next):
-    # from server_main import LOGGER
-    logger = logger_init.get_logger()
-    logger.info(f"Request: {request.method} {request.url}")
+# BaseHTTPMiddleware(app.middleware('http'))는 요청마다 별도 task 생성/응답 래핑 비용이 있으므로 순수 ASGI middleware로 구현
+class RequestLoggerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            LOGGER.info(f"Request: {scope['method']} {URL(scope=scope)}")
+        await self.app(scope, receive, send)
+
+class ResponseLoggerMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                LOGGER.info(f"Response: {message['status']}")
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+### Config ###
+def _fallback_config() -> dict:
+    """context에 설정이 없을 때 사용하는 기본 설정 (load_config가 파일 수정 시각 기준으로 캐시하므로 파일이 바뀔 때만 다시 읽음)"""
+    return load_config("/workspace/config/media-graph_config.json")
+
+
+### Request parsing ###
+# 요청 스키마 검증기를 import 시점에 한 번만 생성하고,
+# 요청 본문(bytes)을 pydantic-core JSON 파서로 바로 검증
+META_REQ_ADAPTER = TypeAdapter(MetaToSceneGraphRequest)
+RETRIEVAL_REQ_ADAPTER = TypeAdapter(RetrivalGraphRequest)
+
+def _request_body_openapi(model) -> dict:
+    """Request를 직접 받는 엔드포인트의 OpenAPI 문서에 요청 스키마를 표시하기 위한 openapi_extra"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
 
-    response = await call_next(request)
+async def parse_request_body(adapter: TypeAdapter, request: Request):
+    """
+    요청 본문을 TypeAdapter로 검증
 
-    return response
+    Args:
+        adapter: 요청 스키마의 TypeAdapter
+        request: FastAPI Request
 
-async def response_logger(request: Request, call_next):
-    # from server_main import LOGGER
-    logger = logger_init.get_logger()
-    response = await call_next(request)
+    Returns:
+        검증된 요청 모델 (검증 실패 시 RequestValidationError -> 422)
+    """
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        # FastAPI 기본 검증 오류와 동일하게 loc 앞에 "body"를 붙여 422로 응답
+        errors = [{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)]
+        raise RequestValidationError(errors)
+
+
+### Status response ###
+# 상태별 응답에 result 포함 여부
+_INCLUDE_RESULT = {
+    TaskStatus.SUCCESS: True,
+    TaskStatus.PROGRESS: True,
+    TaskStatus.PENDING: False,
+    TaskStatus.FAILURE: False,
+    TaskStatus.REVOKED: False,
+}
+
+def _build(task: TaskState, include_result: bool, jobid: Optional[str] = None) -> dict:
+    """
+    태스크 정보로 상태 응답 dict 생성 (Meta2Graph/RetrivalGraph 공용, 상태 응답 스키마와 같은 키)
+    서버가 만든 신뢰할 수 있는 값이므로 pydantic 모델을 거치지 않고 ORJSONResponse로 바로 직렬화
+    """
+    return {
+        "jobid": jobid,
+        "status": task.status_code,
+        "message": task.status,
+        "progress": task.progress,
+        "result": task.result if include_result else None,
+    }
+
+
+# X-Retry-After 힌트 범위 (초)
+MIN_RETRY_AFTER = 0.1
+MAX_RETRY_AFTER = 30.0
+
+def _retry_after_headers(task: TaskState) -> Optional[dict]:
+    """
+    진행 중인 태스크의 남은 시간을 진행률로 추정해 다음 상태 조회 시점 힌트(X-Retry-After, 초)를 만듦
+    (남은 시간 = 경과 시간 * (100 - 진행률) / 진행률, 진행률이 없으면 힌트 없음)
+    """
+    if task.status in FINISHED_STATUSES or not task.created_at or task.progress <= 0:
+        return None
+    elapsed = time.time() - task.created_at
+    remaining = elapsed * (100.0 - task.progress) / task.progress
+    return {"X-Retry-After": f"{min(max(remaining, MIN_RETRY_AFTER), MAX_RETRY_AFTER):.2f}"}
+
+
+def status_response(jobid: str, task: Optional[TaskState]):
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found")
     
-    res_body = [chunk async for chunk in response.body_iterator]
-    response.body_iterator = iterate_in_threadpool(iter(res_body))
-    logger.info(f"Response: {response.status_code}")
+    try:
+        include_result = _INCLUDE_RESULT[task.status]
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown task status")
     
-    return response
+    if task.status in FINISHED_STATUSES:
+        LOGGER.info(f"Task {jobid} finished with status: {task.status}")
+    # Response 객체를 바로 반환해 response_model 재검증을 건너뜀
+    return ORJSONResponse(_build(task, include_result), headers=_retry_after_headers(task))
+
+
+### Long-polling ###
+# GET 상태 조회의 ?wait= 최대 허용값 (초)
+MAX_LONG_POLL_WAIT = 30.0
+
+async def get_task_long_poll(jobid: str, wait: Optional[float], last_status: Optional[int]) -> Optional[TaskState]:
+    """wait가 주어지면 상태가 last_status에서 바뀔 때까지 최대 wait초 대기 후 태스크 정보를 반환"""
+    # Redis/Celery 조회는 blocking I/O이므로 이벤트 루프 밖에서 실행
+    if not wait:
+        return await asyncio.to_thread(task_manager.get_task, jobid)
     
+    try:
+        return await asyncio.wait_for(task_manager.wait_for_change(jobid, last_status), timeout=wait)
+    except asyncio.TimeoutError:
+        return await asyncio.to_thread(task_manager.get_task, jobid)
 
-@GRAPH_ROUTER.post("/v1/meta-to-scenegraph", response_model=BaseResponse)
-async def analyze_meta2graph(request: MetaToSceneGraphRequest):
-    logger = logger_init.get_logger()
-    logger.info(f"Meta-to-SceneGraph Request: {request}")
 
-    # FastAPI 앱에서 설정 가져오기
-    from fastapi import Request
-    from starlette_context import context
+### Batch status ###
+async def batch_status_responses(jobids: List[str]) -> ORJSONResponse:
+    """jobid 목록의 상태를 한 번에 조회해 상태 응답 dict 리스트로 변환 (없는 작업은 status 404)"""
+    # Redis/Celery 백엔드 파이프라인 조회는 blocking I/O이므로 이벤트 루프 밖에서 실행
+    tasks = await asyncio.to_thread(task_manager.get_tasks, jobids)
+    responses = []
+    for jobid, task in zip(jobids, tasks):
+        if task is None:
+            responses.append({"jobid": jobid, "status": 404, "message": "Task not found", "progress": None, "result": None})
+            continue
+        
+        responses.append(_build(task, _INCLUDE_RESULT.get(task.status, False), jobid=jobid))
+    return ORJSONResponse(responses)
+
+
+### Push (SSE / WebSocket) ###
+def status_payload(task: TaskState) -> bytes:
+    """push 채널로 보내는 상태 이벤트 본문 (GET 상태 응답과 같은 필드)"""
+    return orjson.dumps({
+        "status": task.status_code,
+        "message": task.status,
+        "progress": task.progress,
+        "result": task.result if _INCLUDE_RESULT.get(task.status, False) else None
+    })
+
+
+async def task_event_stream(updates, first: TaskState):
+    """태스크 상태가 바뀔 때마다 SSE 이벤트(status)를 전송하고 종료 상태에서 스트림을 닫음"""
+    # 클라이언트가 끊기면 구독(pub/sub 연결)도 바로 정리되도록 aclosing으로 감쌈
+    async with aclosing(updates):
+        yield b"event: status\ndata: " + status_payload(first) + b"\n\n"
+        async for task in updates:
+            yield b"event: status\ndata: " + status_payload(task) + b"\n\n"
+
+
+async def task_event_response(jobid: str) -> StreamingResponse:
+    # 별도 사전 조회 없이 watch_task의 첫 조회(이벤트 루프 밖)로 404 여부를 판단
+    updates = task_manager.watch_task(jobid)
+    first = await anext(updates, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    
+    return StreamingResponse(
+        task_event_stream(updates, first),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+    
+
+@GRAPH_ROUTER.websocket("/ws/jobs/{jobid}")
+async def job_status_websocket(websocket: WebSocket, jobid: str):
+    """작업(meta2graph/retrieval_graph 공용) 상태 변화를 WebSocket으로 push하고 종료 상태 전송 후 연결을 닫음"""
+    await websocket.accept()
+    try:
+        async with aclosing(task_manager.watch_task(jobid)) as updates:
+            # 별도 사전 조회 없이 watch_task의 첫 조회(이벤트 루프 밖)로 존재 여부를 판단
+            task = await anext(updates, None)
+            if task is None:
+                await websocket.close(code=1008, reason="Task not found")
+                return
+            
+            await websocket.send_text(status_payload(task).decode())
+            async for task in updates:
+                await websocket.send_text(status_payload(task).decode())
+        await websocket.close()
+    except WebSocketDisconnect:
+        LOGGER.info(f"WebSocket for task {jobid} disconnected by client.")
     
+
+@GRAPH_ROUTER.post("/v1/meta-to-scenegraph", response_model=BaseResponse,
+                   openapi_extra=_request_body_openapi(MetaToSceneGraphRequest))
+async def analyze_meta2graph(raw_request: Request):
+    request = await parse_request_body(META_REQ_ADAPTER, raw_request)
+    LOGGER.info(f"Meta-to-SceneGraph Request: {request}")
+
+    # FastAPI 앱에서 설정 가져오기
     # 설정을 context에서 가져오기
     config = context.get("config")
     if not config:
-        # fallback으로 직접 로드
-        from contents_graph.utils import load_config
-        config = load_config("/workspace/config/media-graph_config.json")
+        # fallback으로 직접 로드 (최초 1회만 파일을 읽음)
+        config = _fallback_config()
     
     # Meta2Graph 태스크를 Celery에 제출
-    task_id = task_manager.submit_meta2graph_task(
+    # Redis/broker 호출이 이벤트 루프를 막지 않도록 스레드에서 제출
+    task = await asyncio.to_thread(
+        task_manager.submit_meta2graph_task,
         metadata=request.metadata,
         video_info=request.video_info,
         meta2graph_config=config["META_TO_GRAPH"],
@@ -62,74 +258,55 @@ async def analyze_meta2graph(request: MetaToSceneGraphRequest):
         db_config=config["SCENE_GRAPH_DB"]
     )
 
-    if task_id:
-        task_data = task_manager.get_task(task_id)
-        return BaseResponse(
-            jobid=task_id, 
-            status=task_data['status_code'], 
-            message=task_data['status']
-        )
+    if task:
+        # response_model(BaseResponse)은 문서용으로만 유지하고 검증 없이 바로 직렬화
+        return ORJSONResponse({
+            "jobid": task.task_id,
+            "status": task.status_code,
+            "message": task.status
+        })
     else:
         raise HTTPException(status_code=404, detail=f"Failed to create task")
     
 
+@GRAPH_ROUTER.post("/v1/meta-to-scenegraph/status", response_model=List[Meta2GraphStatusResponse])
+async def get_meta2graph_status_batch(request: TaskStatusBatchRequest):
+    """여러 Meta2Graph 작업 상태를 한 번의 요청으로 조회"""
+    return await batch_status_responses(request.jobids)
+
+
 @GRAPH_ROUTER.get("/v1/meta-to-scenegraph/{jobid}", response_model=Meta2GraphStatusResponse)
-async def get_meta2graph_status(jobid: str):
-    logger = logger_init.get_logger()
-    task = task_manager.get_task(jobid)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task['status'] == TaskStatus.SUCCESS:
-        logger.info(f"Task {jobid} completed successfully.")
-        return Meta2GraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"], 
-            result=task["result"]
-        )
-    elif task['status'] == TaskStatus.PENDING:
-        return Meta2GraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"]
-        )
-    elif task['status'] == TaskStatus.PROGRESS:
-        return Meta2GraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"], 
-            result=task["result"]
-        )
-    elif task['status'] in [TaskStatus.FAILURE, TaskStatus.REVOKED]:
-        logger.info(f"Task {jobid} finished with status: {task['status']}")
-        return Meta2GraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"]
-        )
-    else:
-        raise HTTPException(status_code=404, detail="Unknown task status")
+async def get_meta2graph_status(
+    jobid: str,
+    wait: Optional[float] = Query(None, ge=0, le=MAX_LONG_POLL_WAIT, description="상태 변화까지 최대 대기 시간 (초, long-polling)"),
+    last_status: Optional[int] = Query(None, description="클라이언트가 마지막으로 확인한 상태 코드")
+):
+    task = await get_task_long_poll(jobid, wait, last_status)
+    return status_response(jobid, task)
+
+
+@GRAPH_ROUTER.get("/v1/meta-to-scenegraph/{jobid}/events")
+async def stream_meta2graph_status(jobid: str):
+    """Meta2Graph 태스크 상태 변화를 SSE로 push (폴링 GET의 대체 경로)"""
+    return await task_event_response(jobid)
 
 
 @GRAPH_ROUTER.delete("/v1/meta-to-scenegraph/{jobid}", response_model=Meta2GraphStatusResponse)
 async def cancel_meta2graph_task_endpoint(jobid: str):
-    logger = logger_init.get_logger()
-    
     task = task_manager.get_task(jobid)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if task["status"] in [TaskStatus.SUCCESS, TaskStatus.REVOKED, TaskStatus.FAILURE]:
+    if task.status in [TaskStatus.SUCCESS, TaskStatus.REVOKED, TaskStatus.FAILURE]:
         return Meta2GraphStatusResponse(
-            status=task["status_code"], 
+            status=task.status_code, 
             message="Task already finished or cancelled or failed."
         )
     
     # Cancel 처리
     cancelled = task_manager.cancel_task(jobid)
     if cancelled:
-        logger.info(f"Task {jobid} cancelled by user.")
+        LOGGER.info(f"Task {jobid} cancelled by user.")
         return Meta2GraphStatusResponse(
             status=TaskStatusCode.REVOKED, 
             message="Cancellation requested."
@@ -140,98 +317,78 @@ async def cancel_meta2graph_task_endpoint(jobid: str):
 
 
 
-@GRAPH_ROUTER.post("/v1/retrieve-scenegraph", response_model=BaseResponse)
-async def retrieve_scenegraph(request: RetrivalGraphRequest):
-    logger = logger_init.get_logger()
-    logger.info(f"Retrieve-Scenegraph Request: {request}")
+@GRAPH_ROUTER.post("/v1/retrieve-scenegraph", response_model=BaseResponse,
+                   openapi_extra=_request_body_openapi(RetrivalGraphRequest))
+async def retrieve_scenegraph(raw_request: Request):
+    request = await parse_request_body(RETRIEVAL_REQ_ADAPTER, raw_request)
+    LOGGER.info(f"Retrieve-Scenegraph Request: {request}")
 
     # FastAPI 앱에서 설정 가져오기
-    from fastapi import Request
-    from starlette_context import context
-    
     # 설정을 context에서 가져오기
     config = context.get("config")
     if not config:
-        # fallback으로 직접 로드
-        from contents_graph.utils import load_config
-        config = load_config("/workspace/config/media-graph_config.json")
+        # fallback으로 직접 로드 (최초 1회만 파일을 읽음)
+        config = _fallback_config()
     
     # RetrievalGraph 태스크를 Celery에 제출
-    task_id = task_manager.submit_retrieval_graph_task(
+    # Redis/broker 호출이 이벤트 루프를 막지 않도록 스레드에서 제출
+    task = await asyncio.to_thread(
+        task_manager.submit_retrieval_graph_task,
         query=request.query,
         tau=request.tau,
         top_k=request.top_k,
         config=config["RETRIEVAL_GRAPH"]
     )
 
-    if task_id:
-        task_data = task_manager.get_task(task_id)
-        return BaseResponse(
-            jobid=task_id, 
-            status=task_data['status_code'], 
-            message=task_data['status']
-        )
+    if task:
+        # response_model(BaseResponse)은 문서용으로만 유지하고 검증 없이 바로 직렬화
+        return ORJSONResponse({
+            "jobid": task.task_id,
+            "status": task.status_code,
+            "message": task.status
+        })
     else:
         raise HTTPException(status_code=404, detail=f"Failed to create task")
     
 
+@GRAPH_ROUTER.post("/v1/retrieve-scenegraph/status", response_model=List[RetrivalGraphStatusResponse])
+async def get_retrieve_scenegraph_status_batch(request: TaskStatusBatchRequest):
+    """여러 RetrievalGraph 작업 상태를 한 번의 요청으로 조회"""
+    return await batch_status_responses(request.jobids)
+
+
 @GRAPH_ROUTER.get("/v1/retrieve-scenegraph/{jobid}", response_model=RetrivalGraphStatusResponse)
-async def get_retrieve_scenegraph_status(jobid: str):
-    logger = logger_init.get_logger()
-    task = task_manager.get_task(jobid)
-    if not task:
-        raise HTTPException(status_code=404, detail="Task not found")
-    
-    if task['status'] == TaskStatus.SUCCESS:
-        logger.info(f"Task {jobid} completed successfully.")
-        return RetrivalGraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"], 
-            result=task["result"]
-        )
-    elif task['status'] == TaskStatus.PENDING:
-        return RetrivalGraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"]
-        )
-    elif task['status'] == TaskStatus.PROGRESS:
-        return RetrivalGraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"], 
-            result=task["result"]
-        )
-    elif task['status'] in [TaskStatus.FAILURE, TaskStatus.REVOKED]:
-        logger.info(f"Task {jobid} finished with status: {task['status']}")
-        return RetrivalGraphStatusResponse(
-            status=task['status_code'], 
-            message=task["status"], 
-            progress=task["progress"]
-        )
-    else:
-        raise HTTPException(status_code=404, detail="Unknown task status")
+async def get_retrieve_scenegraph_status(
+    jobid: str,
+    wait: Optional[float] = Query(None, ge=0, le=MAX_LONG_POLL_WAIT, description="상태 변화까지 최대 대기 시간 (초, long-polling)"),
+    last_status: Optional[int] = Query(None, description="클라이언트가 마지막으로 확인한 상태 코드")
+):
+    task = await get_task_long_poll(jobid, wait, last_status)
+    return status_response(jobid, task)
+
+
+@GRAPH_ROUTER.get("/v1/retrieve-scenegraph/{jobid}/events")
+async def stream_retrieve_scenegraph_status(jobid: str):
+    """RetrievalGraph 태스크 상태 변화를 SSE로 push (폴링 GET의 대체 경로)"""
+    return await task_event_response(jobid)
 
 
 @GRAPH_ROUTER.delete("/v1/retrieve-scenegraph/{jobid}", response_model=RetrivalGraphStatusResponse)
 async def cancel_retrieve_scenegraph_task_endpoint(jobid: str):
-    logger = logger_init.get_logger()
-    
     task = task_manager.get_task(jobid)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
-    if task["status"] in [TaskStatus.SUCCESS, TaskStatus.REVOKED, TaskStatus.FAILURE]:
+    if task.status in [TaskStatus.SUCCESS, TaskStatus.REVOKED, TaskStatus.FAILURE]:
         return RetrivalGraphStatusResponse(
-            status=task["status_code"], 
+            status=task.status_code, 
             message="Task already finished or cancelled or failed."
         )
     
     # Cancel 처리
     cancelled = task_manager.cancel_task(jobid)
     if cancelled:
-        logger.info(f"Task {jobid} cancelled by user.")
+        LOGGER.info(f"Task {jobid} cancelled by user.")
         return RetrivalGraphStatusResponse(
             status=TaskStatusCode.REVOKED, 
             message="Cancellation requested."
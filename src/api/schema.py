@@ -29,6 +29,7 @@ class StatusResponse(BaseModel):
 
 class Meta2GraphStatusResponse(BaseModel):
     """Meta2Graph 전용 상태 응답 스키마"""
+    jobid: Optional[str] = None  # 일괄 상태 조회 응답에서만 채워짐
     status: int
     message: str
     progress: Optional[float] = None
@@ -41,6 +42,7 @@ class MetaToSceneGraphRequest(BaseModel):
 
 class RetrivalGraphStatusResponse(BaseModel):
     """RetrivalGraph 전용 상태 응답 스키마"""
+    jobid: Optional[str] = None  # 일괄 상태 조회 응답에서만 채워짐
     status: int
     message: str
     progress: Optional[float] = None
@@ -50,4 +52,8 @@ class RetrivalGraphRequest(BaseModel):
     """RetrivalGraph 요청을 위한 스키마"""
     query: str
     tau: float = 0.3
-    top_k: int = 5
\ No newline at end of file
+    top_k: int = 5
+
+class TaskStatusBatchRequest(BaseModel):
+    """여러 작업 상태를 한 번에 조회하기 위한 스키마"""
+    jobids: List[str]
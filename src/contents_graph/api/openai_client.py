@@ -15,17 +15,49 @@ import json
 import time
 from io import BytesIO
 from PIL import Image
+import asyncio
+import functools
+import hashlib
+import httpx
 import concurrent.futures
-from openai import OpenAI
-from datetime import datetime
+import orjson
+from openai import OpenAI, AsyncOpenAI
+
+
+# 타임아웃 적용을 위해 API 호출을 실행하는 공용 스레드 풀 (호출마다 풀을 만들지 않도록 모듈 단위로 공유)
+_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="openai")
+
+# OpenAI HTTP 연결 풀 크기 (api_key별로 클라이언트 하나를 공유)
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_client(api_key):
+    """api_key별 공용 OpenAI 클라이언트 (인스턴스 간 TCP/TLS 연결 재사용)"""
+    return OpenAI(api_key=api_key, http_client=httpx.Client(limits=_HTTP_LIMITS))
+
+
+@functools.lru_cache(maxsize=8)
+def _get_async_client(api_key):
+    """api_key별 공용 AsyncOpenAI 클라이언트"""
+    return AsyncOpenAI(api_key=api_key, http_client=httpx.AsyncClient(limits=_HTTP_LIMITS))
+
+
+# vision 업로드 이미지의 최대 변 길이 (px)
+MAX_IMAGE_SIDE = 2048
+
+# (assistant 이름, 모델, instruction 해시)별 assistant ID 캐시 파일
+ASSISTANT_CACHE_PATH = os.path.expanduser("~/.cache/media_graph/assistants.json")
 
 
 class OpenAIAssistantClient:
     def __init__(self, api_key, model="gpt-4o", assistant_name="", instruction_path=None):
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
         self.model = model
         self.timeout = 120  # 타임아웃을 2분으로 증가
+        self.client = _get_client(self.api_key)
+        # 비동기 경로는 SDK의 요청 타임아웃을 그대로 사용 (with_options는 연결 풀을 공유하는 사본 반환)
+        self.async_client = _get_async_client(self.api_key).with_options(timeout=self.timeout)
 
         if instruction_path is not None:
             try:
@@ -38,10 +70,22 @@ class OpenAIAssistantClient:
         else:
             raise ValueError("instruction_path를 반드시 지정해야 합니다.")
 
+        # 같은 이름/모델/instruction으로 만든 assistant가 캐시에 있으면 retrieve 한 번으로 재사용
+        instruction_hash = hashlib.blake2b(instruction.encode("utf-8"), digest_size=16).hexdigest()
+        cache_key = f"{assistant_name}|{self.model}|{instruction_hash}"
+        self.assistant = self._load_cached_assistant(cache_key, instruction)
+        if self.assistant is not None:
+            print(f"캐시된 assistant '{assistant_name}'({self.assistant.id})를 사용합니다.")
+            return
+
         # 기존 assistant가 있는지 확인
         existing_assistant = self._find_existing_assistant(assistant_name)
         
-        if existing_assistant:
+        if existing_assistant and existing_assistant.instructions == instruction and existing_assistant.model == self.model:
+            # instruction/모델이 같으면 update 요청 없이 그대로 사용
+            self.assistant = existing_assistant
+            print(f"기존 assistant '{assistant_name}'를 그대로 사용합니다.")
+        elif existing_assistant:
             # 기존 assistant가 있으면 instruction만 업데이트
             self.assistant = self.client.beta.assistants.update(
                 assistant_id=existing_assistant.id,
@@ -59,6 +103,50 @@ class OpenAIAssistantClient:
             )
             print(f"새로운 assistant '{assistant_name}'을 생성했습니다.")
 
+        self._save_cached_assistant(cache_key, self.assistant.id)
+
+    def _load_cached_assistant(self, cache_key, instruction):
+        """
+        캐시 파일에 저장된 assistant ID로 assistant를 조회합니다.
+        없거나 조회에 실패했거나, 같은 이름의 다른 클라이언트가 instruction/모델을 바꿔 두었다면 None을 반환합니다.
+        """
+        try:
+            with open(ASSISTANT_CACHE_PATH, "r", encoding="utf-8") as f:
+                assistant_id = json.load(f).get(cache_key)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if not assistant_id:
+            return None
+
+        try:
+            assistant = self.client.beta.assistants.retrieve(assistant_id)
+        except Exception as e:
+            print(f"캐시된 assistant 조회 실패, 새로 검색합니다: {e}")
+            return None
+
+        if assistant.instructions != instruction or assistant.model != self.model:
+            return None
+        return assistant
+
+    def _save_cached_assistant(self, cache_key, assistant_id):
+        """assistant ID를 캐시 파일에 저장 (임시 파일 작성 후 교체)"""
+        try:
+            os.makedirs(os.path.dirname(ASSISTANT_CACHE_PATH), exist_ok=True)
+            try:
+                with open(ASSISTANT_CACHE_PATH, "r", encoding="utf-8") as f:
+                    cache = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                cache = {}
+
+            cache[cache_key] = assistant_id
+            tmp_path = f"{ASSISTANT_CACHE_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f, indent=2)
+            os.replace(tmp_path, ASSISTANT_CACHE_PATH)
+        except OSError as e:
+            print(f"assistant 캐시 저장 실패: {e}")
+
     def _find_existing_assistant(self, assistant_name):
         """동일한 이름의 assistant가 있는지 확인하고 반환"""
         if not assistant_name:
@@ -75,16 +163,30 @@ class OpenAIAssistantClient:
             print(f"기존 assistant 검색 중 오류 발생: {e}")
             return None
 
-    def _init_thread(self):
-        return self.client.beta.threads.create()
+    def _delete_thread(self, thread_id):
+        """사용이 끝난 thread 삭제 (응답 경로 밖에서 실행, 실패해도 무시)"""
+        try:
+            self.client.beta.threads.delete(thread_id)
+        except Exception as e:
+            print(f"thread 삭제 중 오류 발생: {e}")
 
     def _process_image(self, img):
         if isinstance(img, str):  # file path
             return open(img, "rb")
         elif isinstance(img, Image.Image):
+            # vision 입력은 어차피 2048px 이내로 축소되므로 업로드 전에 줄임 (원본 이미지는 변경하지 않음)
+            if img.width > MAX_IMAGE_SIDE or img.height > MAX_IMAGE_SIDE:
+                img = img.copy()
+                img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+
+            # 알파 채널이 없는 이미지는 PNG보다 인코딩이 빠르고 작은 JPEG로 업로드
             buffered = BytesIO()
-            img.save(buffered, format="PNG")
-            buffered.name = "image.png"
+            if img.mode in ("RGB", "L"):
+                img.save(buffered, format="JPEG", quality=90)
+                buffered.name = "image.jpg"
+            else:
+                img.save(buffered, format="PNG")
+                buffered.name = "image.png"
             buffered.seek(0)
             return buffered
         elif isinstance(img, bytes):
@@ -95,8 +197,6 @@ class OpenAIAssistantClient:
         return img
 
     def _run(self, prompt, image=None):
-        thread = self._init_thread()
-
         # 메시지 구성
         if image:
             input_file = self.client.files.create(
@@ -112,34 +212,31 @@ class OpenAIAssistantClient:
         else:
             msg_content = [{"type": "text", "text": prompt}]
 
-        self.client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=msg_content,
-        )
-
-        run = self.client.beta.threads.runs.create(
-            thread_id=thread.id,
+        # thread 생성 + 메시지 추가 + run 생성을 한 번의 요청으로 처리
+        run = self.client.beta.threads.create_and_run(
             assistant_id=self.assistant.id,
+            thread={"messages": [{"role": "user", "content": msg_content}]},
             temperature=1.0,
         )
 
-        # Polling
-        max_wait_time = 120  # 최대 2분 대기
-        start_time = time.time()
-        
-        while True:
-            if time.time() - start_time > max_wait_time:
-                return f"[ERROR] Run timeout after {max_wait_time}s"
+        try:
+            # Polling (create_and_run 응답 상태부터 확인, 0.25초부터 최대 2초까지 지수 백오프)
+            max_wait_time = 120  # 최대 2분 대기
+            start_time = time.time()
+            run_status = run
+            delay = 0.25
+            
+            while run_status.status in ["queued", "in_progress"]:
+                if time.time() - start_time > max_wait_time:
+                    return f"[ERROR] Run timeout after {max_wait_time}s"
                 
-            run_status = self.client.beta.threads.runs.retrieve(
-                thread_id=thread.id, run_id=run.id
-            )
-            if run_status.status == "completed":
-                break
-            elif run_status.status in ["queued", "in_progress"]:
-                time.sleep(2)
-            elif run_status.status == "failed":
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
+                run_status = self.client.beta.threads.runs.retrieve(
+                    thread_id=run.thread_id, run_id=run.id
+                )
+            
+            if run_status.status == "failed":
                 error_msg = f"[ERROR] Run failed: {run_status.status}"
                 if hasattr(run_status, 'last_error') and run_status.last_error:
                     error_msg += f" - {run_status.last_error.message}"
@@ -148,91 +245,126 @@ class OpenAIAssistantClient:
                 return f"[ERROR] Run cancelled: {run_status.status}"
             elif run_status.status == "expired":
                 return f"[ERROR] Run expired: {run_status.status}"
-            else:
+            elif run_status.status != "completed":
                 return f"[ERROR] Unknown run status: {run_status.status}"
 
-        messages = self.client.beta.threads.messages.list(thread_id=thread.id)
-        result = messages.data[0].content[0].text.value.strip()
-        self.client.beta.threads.delete(thread.id)
-        return result
+            # 가장 최근 메시지(assistant 응답)만 조회
+            messages = self.client.beta.threads.messages.list(thread_id=run.thread_id, limit=1)
+            return messages.data[0].content[0].text.value.strip()
+        finally:
+            # thread 삭제는 결과 반환을 기다리게 하지 않도록 백그라운드에서 처리
+            _EXECUTOR.submit(self._delete_thread, run.thread_id)
 
     def __call__(self, prompt, image=None):
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(self._run, prompt, image)
-            try:
-                result = future.result(timeout=self.timeout)
-                # 에러 메시지인지 확인
-                if result.startswith("[ERROR]"):
-                    print(f"API 호출 에러: {result}")
-                    return ""
-                return result
-            except concurrent.futures.TimeoutError:
-                print(f"API 호출 타임아웃 (timeout={self.timeout}s)")
-                return ""
-            except Exception as e:
-                print(f"API 호출 예외: {str(e)}")
+        future = _EXECUTOR.submit(self._run, prompt, image)
+        try:
+            result = future.result(timeout=self.timeout)
+            # 에러 메시지인지 확인
+            if result.startswith("[ERROR]"):
+                print(f"API 호출 에러: {result}")
                 return ""
+            return result
+        except concurrent.futures.TimeoutError:
+            print(f"API 호출 타임아웃 (timeout={self.timeout}s)")
+            return ""
+        except Exception as e:
+            print(f"API 호출 예외: {str(e)}")
+            return ""
 
-    def run_batch_job(self, prompts, output_file="output/batch_output.jsonl"):
-        jsonl_filename = "output/batch_input.jsonl"
-        with open(jsonl_filename, "w", encoding="utf-8") as f:
-            for prompt in prompts:
-                # ✅ custom_id: timestamp 기반 생성
-                timestamp_id = datetime.now().strftime("%Y%m%d%H%M%S%f")  # 예: 20250529104530123456
-                request = {
-                    "custom_id": f"req_{timestamp_id}",
-                    "method": "POST",
-                    "url": "/v1/chat/completions",
-                    "body": {
-                        "model": self.model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.7,
-                    }
-                }
-                f.write(json.dumps(request) + "\n")
-        
-        # 이후는 동일
-        uploaded_file = self.client.files.create(
-            file=open(jsonl_filename, "rb"),
-            purpose="batch"
-        )
-        print(f"Uploaded file ID: {uploaded_file.id}")
+    async def _arun(self, prompt, image=None):
+        """_run의 비동기 버전 (AsyncOpenAI 사용, 여러 프롬프트를 한 이벤트 루프에서 동시에 처리)"""
+        if image:
+            input_file = await self.async_client.files.create(
+                file=self._process_image(image), purpose="vision"
+            )
+            msg_content = [
+                {"type": "text", "text": prompt},
+                {
+                    "type": "image_file",
+                    "image_file": {"file_id": input_file.id, "detail": "auto"},
+                },
+            ]
+        else:
+            msg_content = [{"type": "text", "text": prompt}]
 
-        batch_job = self.client.batches.create(
-            input_file_id=uploaded_file.id,
-            endpoint="/v1/chat/completions",
-            completion_window="24h"
+        run = await self.async_client.beta.threads.create_and_run(
+            assistant_id=self.assistant.id,
+            thread={"messages": [{"role": "user", "content": msg_content}]},
+            temperature=1.0,
         )
-        print(f"Batch job ID: {batch_job.id}")
 
-        while True:
-            status = self.client.batches.retrieve(batch_job.id)
-            print(f"Batch job status: {status.status}")
-            if status.status == "completed":
-                break
-            elif status.status in ["failed", "expired"]:
-                raise RuntimeError(f"Batch job failed with status: {status.status}")
-            time.sleep(5)
+        try:
+            run_status = run
+            delay = 0.25
+            while run_status.status in ["queued", "in_progress"]:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+                run_status = await self.async_client.beta.threads.runs.retrieve(
+                    thread_id=run.thread_id, run_id=run.id
+                )
+
+            if run_status.status != "completed":
+                error_msg = f"[ERROR] Run {run_status.status}"
+                if getattr(run_status, 'last_error', None):
+                    error_msg += f" - {run_status.last_error.message}"
+                return error_msg
 
-        result_file = self.client.files.retrieve(status.output_file_id)
-        result_content = self.client.files.content(result_file.id)
+            messages = await self.async_client.beta.threads.messages.list(thread_id=run.thread_id, limit=1)
+            return messages.data[0].content[0].text.value.strip()
+        finally:
+            try:
+                await self.async_client.beta.threads.delete(run.thread_id)
+            except Exception as e:
+                print(f"thread 삭제 중 오류 발생: {e}")
 
-        # 바이너리 응답을 bytes로 변환하여 저장
-        with open(output_file, "wb") as f:
-            f.write(result_content.read())
-        print(f"Batch results saved to {output_file}")
+    async def acall(self, prompt, image=None):
+        """__call__의 비동기 버전 (타임아웃/에러 시 빈 문자열 반환)"""
+        try:
+            result = await asyncio.wait_for(self._arun(prompt, image), timeout=self.timeout)
+            if result.startswith("[ERROR]"):
+                print(f"API 호출 에러: {result}")
+                return ""
+            return result
+        except asyncio.TimeoutError:
+            print(f"API 호출 타임아웃 (timeout={self.timeout}s)")
+            return ""
+        except Exception as e:
+            print(f"API 호출 예외: {str(e)}")
+            return ""
+
+    async def acall_many(self, prompts):
+        """
+        여러 프롬프트를 동시에 요청하고 입력 순서대로 결과를 반환합니다.
+        
+        Args:
+            prompts (list): 프롬프트 리스트
+        
+        Returns:
+            list: 응답 문자열 리스트 (실패한 항목은 "")
+        """
+        return await asyncio.gather(*[self.acall(prompt) for prompt in prompts])
+
+    def run_batch_job(self, prompts, output_file="output/batch_output.jsonl"):
+        """batch API로 prompts를 처리하고 결과 JSONL 전체를 문자열로 반환"""
+        submit_batch_job(self.client, self.model, prompts, output_file)
 
         # 원본 응답 내용을 문자열로 반환
         with open(output_file, "r", encoding="utf-8") as f:
             return f.read()
-        
+
+    def run_batch_job_iter(self, prompts, output_file="output/batch_output.jsonl"):
+        """batch API로 prompts를 처리하고 결과를 한 줄(dict)씩 yield하는 iterator 반환"""
+        submit_batch_job(self.client, self.model, prompts, output_file)
+        return iter_batch_results(output_file)
 
 class OpenAIChatClient:
     def __init__(self, api_key, model="gpt-4o", timeout=120):
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
         self.model = model
         self.timeout = timeout  # seconds
+        # 단일 요청이므로 별도 스레드 없이 SDK의 요청 타임아웃으로 처리
+        self.client = _get_client(self.api_key).with_options(timeout=self.timeout)
+        self.async_client = _get_async_client(self.api_key).with_options(timeout=self.timeout)
 
     def _run(self, prompt):
         try:
@@ -242,70 +374,118 @@ class OpenAIChatClient:
                 temperature=0.7
             )
             return response.choices[0].message.content.strip()
+        except openai.APITimeoutError:
+            return f"[ERROR] ChatCompletion timeout (timeout={self.timeout}s)"
         except Exception as e:
             return f"[ERROR] ChatCompletion failed: {str(e)}"
 
     def __call__(self, prompt):
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(self._run, prompt)
-            try:
-                result = future.result(timeout=self.timeout)
-                if result.startswith("[ERROR]"):
-                    print(f"API 호출 에러: {result}")
-                    return ""
-                return result
-            except concurrent.futures.TimeoutError:
-                print(f"API 호출 타임아웃 (timeout={self.timeout}s)")
-                return ""
-            except Exception as e:
-                print(f"API 호출 예외: {str(e)}")
-                return ""
-
-    def run_batch_job(self, prompts, output_file="output/batch_output.jsonl"):
-        jsonl_filename = "output/batch_input.jsonl"
-        with open(jsonl_filename, "w", encoding="utf-8") as f:
-            for prompt in prompts:
-                timestamp_id = datetime.now().strftime("%Y%m%d%H%M%S%f")
-                request = {
-                    "custom_id": f"req_{timestamp_id}",
-                    "method": "POST",
-                    "url": "/v1/chat/completions",
-                    "body": {
-                        "model": self.model,
-                        "messages": [{"role": "user", "content": prompt}],
-                        "temperature": 0.7,
-                    }
-                }
-                f.write(json.dumps(request) + "\n")
-
-        uploaded_file = self.client.files.create(
-            file=open(jsonl_filename, "rb"),
-            purpose="batch"
-        )
-        print(f"Uploaded file ID: {uploaded_file.id}")
-
-        batch_job = self.client.batches.create(
-            input_file_id=uploaded_file.id,
-            endpoint="/v1/chat/completions",
-            completion_window="24h"
-        )
-        print(f"Batch job ID: {batch_job.id}")
+        result = self._run(prompt)
+        if result.startswith("[ERROR]"):
+            print(f"API 호출 에러: {result}")
+            return ""
+        return result
 
-        while True:
-            status = self.client.batches.retrieve(batch_job.id)
-            print(f"Batch job status: {status.status}")
-            if status.status == "completed":
-                break
-            elif status.status in ["failed", "expired"]:
-                raise RuntimeError(f"Batch job failed with status: {status.status}")
-            time.sleep(5)
+    async def _arun(self, prompt):
+        """_run의 비동기 버전 (AsyncOpenAI 사용)"""
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.7
+            )
+            return response.choices[0].message.content.strip()
+        except openai.APITimeoutError:
+            return f"[ERROR] ChatCompletion timeout (timeout={self.timeout}s)"
+        except Exception as e:
+            return f"[ERROR] ChatCompletion failed: {str(e)}"
 
-        result_file = self.client.files.retrieve(status.output_file_id)
-        result_content = self.client.files.content(result_file.id)
+    async def acall(self, prompt):
+        """__call__의 비동기 버전 (타임아웃/에러 시 빈 문자열 반환)"""
+        result = await self._arun(prompt)
+        if result.startswith("[ERROR]"):
+            print(f"API 호출 에러: {result}")
+            return ""
+        return result
 
-        with open(output_file, "wb") as f:
-            f.write(result_content.read())
-        print(f"Batch results saved to {output_file}")
+    def run_batch_job(self, prompts, output_file="output/batch_output.jsonl"):
+        """batch API로 prompts를 처리하고 결과 JSONL 전체를 문자열로 반환"""
+        submit_batch_job(self.client, self.model, prompts, output_file)
 
+        # 원본 응답 내용을 문자열로 반환
         with open(output_file, "r", encoding="utf-8") as f:
-            return f.read()
\ No newline at end of file
+            return f.read()
+
+    def run_batch_job_iter(self, prompts, output_file="output/batch_output.jsonl"):
+        """batch API로 prompts를 처리하고 결과를 한 줄(dict)씩 yield하는 iterator 반환"""
+        submit_batch_job(self.client, self.model, prompts, output_file)
+        return iter_batch_results(output_file)
+
+
+def _write_batch_input(jsonl_filename, model, prompts):
+    """batch 입력 JSONL 작성 (orjson으로 한 줄씩 바이너리 기록)"""
+    with open(jsonl_filename, "wb") as f:
+        # ✅ custom_id: 시작 timestamp(ns) + 프롬프트 순번 (유일하고 입력 순서를 그대로 보존)
+        t0 = time.time_ns()
+        for i, prompt in enumerate(prompts):
+            # prompt는 문자열(user 메시지) 또는 (system, user) 튜플
+            if isinstance(prompt, tuple):
+                system, user = prompt
+                messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+            else:
+                messages = [{"role": "user", "content": prompt}]
+            request = {
+                "custom_id": f"req_{t0}_{i}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 0.7,
+                }
+            }
+            f.write(orjson.dumps(request))
+            f.write(b"\n")
+
+
+def submit_batch_job(client, model, prompts, output_file="output/batch_output.jsonl"):
+    """
+    prompts로 batch 작업을 생성하고 완료될 때까지 기다린 뒤 결과를 output_file에 저장합니다.
+    결과 파일은 메모리에 모으지 않고 청크 단위로 기록합니다.
+    """
+    jsonl_filename = "output/batch_input.jsonl"
+    _write_batch_input(jsonl_filename, model, prompts)
+
+    with open(jsonl_filename, "rb") as f:
+        uploaded_file = client.files.create(file=f, purpose="batch")
+    print(f"Uploaded file ID: {uploaded_file.id}")
+
+    batch_job = client.batches.create(
+        input_file_id=uploaded_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"Batch job ID: {batch_job.id}")
+
+    while True:
+        status = client.batches.retrieve(batch_job.id)
+        print(f"Batch job status: {status.status}")
+        if status.status == "completed":
+            break
+        elif status.status in ["failed", "expired"]:
+            raise RuntimeError(f"Batch job failed with status: {status.status}")
+        time.sleep(5)
+
+    result_content = client.files.content(status.output_file_id)
+    with open(output_file, "wb") as f:
+        for chunk in result_content.iter_bytes():
+            f.write(chunk)
+    print(f"Batch results saved to {output_file}")
+
+
+def iter_batch_results(output_file):
+    """batch 결과 JSONL을 한 줄씩 파싱해 yield (전체 내용을 메모리에 올리지 않음)"""
+    with open(output_file, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
@@ -1,6 +1,9 @@
 import os
 import sys
+import threading
+import redis
 from celery import Celery
+from celery.signals import worker_ready, worker_shutdown
 from dotenv import load_dotenv
 
 # Python 경로에 src 디렉토리 추가
@@ -9,6 +12,9 @@ sys.path.insert(0, '/workspace')
 
 load_dotenv()
 
+# prefork 워커에서 fork 이후 HuggingFace tokenizers 병렬 처리로 인한 경고/교착을 방지
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
 # Celery 앱 설정
 celery_app = Celery(
     'media-graph',
@@ -31,6 +37,10 @@ celery_app.conf.update(
     task_acks_late=True,
     worker_disable_rate_limits=True,
     result_expires=3600,  # 1시간
+    # 브로커/결과 백엔드 연결을 풀로 유지해 태스크 전송·상태 조회마다 재연결하지 않음
+    broker_pool_limit=10,
+    redis_max_connections=20,
+    redis_socket_keepalive=True,
 )
 
 # 큐 설정
@@ -49,5 +59,81 @@ except ImportError:
     logger = logging.getLogger(__name__)
     logging.basicConfig(level=logging.INFO)
 
+# 워커 생존 표시 키 (API 서버가 broadcast RPC 없이 SCAN 한 번으로 워커와 구독 큐를 확인)
+WORKER_ALIVE_PREFIX = "media_graph_worker:alive:"
+WORKER_ALIVE_TTL = 30  # 초 (TTL/3 간격으로 갱신하므로 워커가 죽으면 TTL 안에 키가 사라짐)
+
+_worker_alive_stop = threading.Event()
+
+def _worker_alive_loop(redis_client, key, queues):
+    """워커 메인 프로세스에서 생존 표시 키를 주기적으로 갱신하고, 종료 시 삭제"""
+    while not _worker_alive_stop.is_set():
+        try:
+            redis_client.setex(key, WORKER_ALIVE_TTL, queues)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to refresh worker heartbeat {key}: {e}")
+        _worker_alive_stop.wait(WORKER_ALIVE_TTL / 3)
+
+    try:
+        redis_client.delete(key)
+    except redis.RedisError:
+        pass
+
+@worker_ready.connect
+def _on_worker_ready(sender, **kwargs):
+    redis_client = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'), decode_responses=True)
+    # -Q로 큐를 지정하지 않은 워커는 정의된 모든 큐를 구독
+    amqp_queues = sender.app.amqp.queues
+    queues = ",".join(sorted(amqp_queues.consume_from or amqp_queues))
+    key = f"{WORKER_ALIVE_PREFIX}{sender.hostname}"
+    threading.Thread(target=_worker_alive_loop, args=(redis_client, key, queues),
+                     name="worker-alive", daemon=True).start()
+
+@worker_shutdown.connect
+def _on_worker_shutdown(**kwargs):
+    _worker_alive_stop.set()
+
+# 태스크 상태 변경 알림 채널 (워커가 상태를 바꿀 때 PUBLISH, API 서버의 SSE/WebSocket/long-polling이 SUBSCRIBE)
+TASK_EVENT_CHANNEL_PREFIX = "media_graph_task_events:"
+
+_event_redis = None
+
+def task_event_channel(celery_task_id: str) -> str:
+    """Celery 태스크 ID에 해당하는 상태 변경 알림 채널 이름"""
+    return f"{TASK_EVENT_CHANNEL_PREFIX}{celery_task_id}"
+
+def publish_task_event(celery_task_id: str, state: str):
+    """
+    태스크 상태 변경을 알림 채널에 PUBLISH합니다. (상태 자체는 결과 백엔드/태스크 해시에서 다시 읽음)
+    알림 실패는 태스크 처리에 영향을 주지 않도록 경고만 남깁니다.
+    """
+    global _event_redis
+    if _event_redis is None:
+        # fork 이후 프로세스마다 처음 사용할 때 연결 생성
+        _event_redis = redis.Redis.from_url(os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+    try:
+        _event_redis.publish(task_event_channel(celery_task_id), state)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to publish task event for {celery_task_id}: {e}")
+
+def get_alive_worker_queues(redis_client) -> dict:
+    """
+    생존 표시 키를 SCAN해 살아있는 워커와 각 워커가 구독하는 큐를 반환합니다.
+
+    Args:
+        redis_client (redis.Redis): decode_responses=True인 Redis 클라이언트
+
+    Returns:
+        Dict[str, List[str]]: {워커 hostname: [큐 이름, ...]}
+    """
+    keys = list(redis_client.scan_iter(match=f"{WORKER_ALIVE_PREFIX}*", count=100))
+    if not keys:
+        return {}
+    values = redis_client.mget(keys)
+    return {
+        key[len(WORKER_ALIVE_PREFIX):]: value.split(",") if value else []
+        for key, value in zip(keys, values) if value is not None
+    }
+
 if __name__ == '__main__':
     celery_app.start()
@@ -5,15 +5,202 @@ meta_data를 입력받아 API를 이용해서 장면 그래프로 변환하는 
 """
 
 import os
-import json
+import logging
+import hashlib
+import functools
+import copy
+import asyncio
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import orjson
 import re
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Union
 from dotenv import load_dotenv
+from tqdm import tqdm
 
 from contents_graph.api.openai_client import OpenAIAssistantClient
 
-load_dotenv()
+@functools.lru_cache(maxsize=1)
+def _env() -> Dict[str, str]:
+    """.env를 프로세스당 한 번만 읽고 환경변수 스냅샷을 반환"""
+    load_dotenv()
+    return dict(os.environ)
+
+
+@functools.lru_cache(maxsize=32)
+def _read_instruction(path: str, mtime_ns: int) -> str:
+    """instruction 파일 내용 캐시 (mtime_ns가 키에 포함되어 파일이 수정되면 다시 읽음)"""
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+# 기존처럼 import 시점에 .env를 환경변수에 반영 (다른 모듈의 os.getenv도 그대로 동작)
+_env()
+
+logger = logging.getLogger(__name__)
+
+# use_raw_aiohttp 모드에서 직접 호출하는 Chat Completions 엔드포인트
+CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+
+# 응답 정리용 정규식 (호출마다 컴파일/캐시 조회하지 않도록 미리 컴파일)
+_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.IGNORECASE)
+
+# meta_data 입력 타입 (dict 또는 이미 직렬화된 JSON str/bytes)
+MetaData = Union[Dict[str, Any], str, bytes, bytearray]
+
+# batch 결과가 이 개수 이상이면 응답 파싱을 프로세스 풀에서 병렬 처리
+PARALLEL_PARSE_THRESHOLD = 128
+
+def _find_outer_json(s: str) -> Optional[str]:
+    """
+    문자열에서 처음 나오는 JSON 객체/배열 블록을 괄호 짝을 맞춰 한 번의 선형 스캔으로 찾습니다.
+    (문자열 리터럴 안의 괄호와 이스케이프는 무시)
+
+    Args:
+        s (str): 검색할 문자열
+
+    Returns:
+        Optional[str]: JSON 블록 문자열 또는 None (시작 괄호가 없거나 짝이 맞지 않음)
+    """
+    obj_start, arr_start = s.find("{"), s.find("[")
+    starts = [i for i in (obj_start, arr_start) if i != -1]
+    if not starts:
+        return None
+    start = min(starts)
+
+    depth = 0
+    in_str = False
+    escaped = False
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "{[":
+            depth += 1
+        elif ch in "}]":
+            depth -= 1
+            if depth == 0:
+                return s[start:i + 1]
+    return None
+
+
+def _clean_and_parse_scene_graph(raw: str) -> Any:
+    """
+    API 응답을 정리하고 JSON으로 파싱합니다.
+
+    Args:
+        raw (str): API 응답 문자열
+
+    Returns:
+        Any: 파싱된 JSON 객체 또는 None
+    """
+    if not isinstance(raw, str):
+        return None
+
+    s = raw.strip()
+    # 코드펜스 제거 (JSON으로 바로 시작하는 일반적인 응답은 건너뜀)
+    if s.startswith("```"):
+        # ```json\n...\n``` 형태는 정규식 없이 슬라이싱으로 제거
+        nl = s.find("\n")
+        end = s.rfind("```")
+        if nl != -1 and end > nl:
+            s = s[nl + 1:end].strip()
+        else:
+            s = _FENCE_RE.sub("", s)
+    elif not s.startswith(("{", "[")):
+        s = _FENCE_RE.sub("", s)
+
+    # 응답이 또다른 문자열 JSON을 감싼 경우 ("{\"...\"}"): 바깥 문자열을 풀고 안쪽을 바로 파싱
+    if s.startswith('"') and s.endswith('"'):
+        try:
+            inner = orjson.loads(s)
+        except orjson.JSONDecodeError:
+            inner = None
+        if isinstance(inner, str):
+            try:
+                return orjson.loads(inner)
+            except orjson.JSONDecodeError:
+                return inner
+
+    # 1차 파싱
+    try:
+        return orjson.loads(s)
+    except orjson.JSONDecodeError:
+        pass
+
+    # 바깥 JSON 블록만 추출해서 재시도
+    block = _find_outer_json(s)
+    if block is not None:
+        try:
+            return orjson.loads(block)
+        except orjson.JSONDecodeError:
+            return None
+    return None
+
+
+def _extract_message_content(outer: dict) -> str:
+    """
+    OpenAIAssistantClient의 응답 구조에서 content를 추출합니다.
+
+    Args:
+        outer (dict): API 응답 객체
+
+    Returns:
+        str: 추출된 content 문자열
+    """
+    # 정상 응답은 구조가 고정되어 있으므로 기본값 dict 생성 없이 바로 인덱싱하고, 구조가 다르면 빈 문자열
+    try:
+        content = outer["response"]["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return ""
+    if content is None:
+        return ""
+    if isinstance(content, str):
+        return content
+    # content가 list[dict] (예: [{"type":"text","text":"..."}]) 형태일 수도 있음
+    if isinstance(content, list):
+        texts = []
+        for part in content:
+            if isinstance(part, dict):
+                if "text" in part and isinstance(part["text"], str):
+                    texts.append(part["text"])
+                elif "content" in part and isinstance(part["content"], str):
+                    texts.append(part["content"])
+        return "\n".join(texts).strip()
+    # 기타 타입은 문자열 변환
+    return str(content)
+
+
+def _parse_batch_result(outer: dict) -> tuple:
+    """
+    batch 결과 한 줄(dict)을 장면 그래프로 변환합니다. (프로세스 풀에서 실행할 수 있도록 모듈 수준 함수)
+    
+    Args:
+        outer (dict): batch 결과 한 줄
+        
+    Returns:
+        tuple: (custom_id, 장면 그래프 또는 None)
+    """
+    custom_id = outer.get("custom_id")
+    try:
+        content = _extract_message_content(outer)
+        if not content:
+            return custom_id, None
+        return custom_id, _clean_and_parse_scene_graph(content) or None
+    except Exception as e:
+        logger.error(f"❌ 응답 {custom_id} 처리 오류: {e}")
+        return custom_id, None
+
 
 class MetaToGraphConverter:
     """
@@ -24,7 +211,10 @@ class MetaToGraphConverter:
                  instruction_path: str = "config/instruction/meta2graph_ver2_kor.txt",
                  api_key: Optional[str] = None,
                  model: str = "gpt-4o",
-                 assistant_name: str = "meta2graph"):
+                 assistant_name: str = "meta2graph",
+                 use_raw_aiohttp: bool = False,
+                 aiohttp_limit: int = 256,
+                 cache_dir: Optional[str] = None):
         """
         MetaToGraphConverter 초기화
         
@@ -33,20 +223,33 @@ class MetaToGraphConverter:
             api_key (str, optional): OpenAI API 키. None이면 환경변수에서 로드
             model (str): 사용할 모델명
             assistant_name (str): assistant 이름
+            use_raw_aiohttp (bool): True면 acall/amap이 SDK 대신 aiohttp로 /v1/chat/completions에 직접 요청
+            aiohttp_limit (int): aiohttp 커넥션 풀 크기
+            cache_dir (str, optional): 변환 결과 캐시 디렉토리. None이면 캐시 사용 안 함
         """
         self.instruction_path = instruction_path
         self.model = model
         self.assistant_name = assistant_name
+        self.use_raw_aiohttp = use_raw_aiohttp
+        self.aiohttp_limit = aiohttp_limit
+        self._session = None
         
         # API 키 설정
         if api_key is None:
-            api_key = os.getenv("OPEN_AI_API_KEY")
+            api_key = _env().get("OPEN_AI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API 키가 필요합니다. 환경변수 OPEN_AI_API_KEY를 설정하거나 api_key 파라미터를 전달하세요.")
+        self.api_key = api_key
         
         # instruction 로드
         self.instruction = self._load_instruction()
         
+        # 결과 캐시 (instruction/모델이 바뀌면 키도 바뀌도록 instruction 해시를 미리 계산)
+        self.cache_dir = cache_dir
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._instruction_digest = hashlib.blake2b(self.instruction.encode("utf-8"), digest_size=16).digest()
+        
         # OpenAI 클라이언트 초기화
         self.assistant_client = OpenAIAssistantClient(
             api_key=api_key,
@@ -63,140 +266,203 @@ class MetaToGraphConverter:
             str: instruction 내용
         """
         try:
-            with open(self.instruction_path, encoding="utf-8") as f:
-                return f.read()
+            # 같은 파일로 여러 converter를 만들어도 파일은 한 번만 읽음
+            return _read_instruction(self.instruction_path, os.stat(self.instruction_path).st_mtime_ns)
         except FileNotFoundError:
             raise FileNotFoundError(f"Instruction 파일을 찾을 수 없습니다: {self.instruction_path}")
         except Exception as e:
             raise Exception(f"Instruction 파일 로드 중 오류 발생: {e}")
     
     def _clean_and_parse_scene_graph(self, raw: str) -> Any:
+        """API 응답을 정리하고 JSON으로 파싱합니다. (모듈 함수 _clean_and_parse_scene_graph 사용)"""
+        return _clean_and_parse_scene_graph(raw)
+    
+    def _extract_message_content(self, outer: dict) -> str:
+        """OpenAIAssistantClient의 응답 구조에서 content를 추출합니다. (모듈 함수 _extract_message_content 사용)"""
+        return _extract_message_content(outer)
+    
+    def _get_scene_number(self, meta_data: MetaData, scene_number: Optional[str]) -> str:
+        """scene_number가 없으면 meta_data에서 추출 (없으면 ValueError)"""
+        if scene_number is None:
+            # 직렬화된 meta_data는 파싱하지 않으므로 scene_number를 직접 전달해야 함
+            scene_number = meta_data.get("Scene Number") if isinstance(meta_data, dict) else None
+            if not scene_number:
+                raise ValueError("meta_data에 'Scene Number'가 없거나 scene_number 파라미터를 전달해야 합니다.")
+        return scene_number
+
+    def _cache_key(self, meta_data: MetaData, scene_number: str) -> str:
+        """(instruction, 모델, 장면 번호, meta_data)로 캐시 키 생성 (dict는 키 정렬 후 직렬화, str/bytes는 그대로 사용)"""
+        h = hashlib.blake2b(self._instruction_digest, digest_size=16)
+        h.update(self.model.encode("utf-8"))
+        h.update(str(scene_number).encode("utf-8"))
+        if isinstance(meta_data, (bytes, bytearray)):
+            h.update(meta_data)
+        elif isinstance(meta_data, str):
+            h.update(meta_data.encode("utf-8"))
+        else:
+            h.update(orjson.dumps(meta_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        return h.hexdigest()
+
+    def _cache_get(self, key: str) -> Optional[Dict[str, Any]]:
+        """캐시된 장면 그래프 조회 (캐시 미사용/미존재/손상 시 None)"""
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, f"{key}.json"), "rb") as f:
+                return orjson.loads(f.read())
+        except (FileNotFoundError, orjson.JSONDecodeError):
+            return None
+
+    def _cache_put(self, key: str, scene_graph: Dict[str, Any]):
+        """장면 그래프를 캐시에 저장 (임시 파일 작성 후 교체, 실패해도 무시)"""
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(orjson.dumps(scene_graph, option=orjson.OPT_NON_STR_KEYS))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"⚠️ 캐시 저장 실패: {e}")
+
+    def _build_user_message(self, meta_data: MetaData, scene_number: str) -> str:
+        """
+        장면별 user 메시지를 생성합니다.
+        instruction(system)은 모든 장면에서 동일하게 유지해 OpenAI prompt cache가 instruction 전체에 적용되도록 하고,
+        $SCENE_NUMBER 값과 메타 데이터만 user 메시지로 전달합니다.
+        이미 JSON으로 직렬화된 meta_data(str/bytes)는 다시 직렬화하지 않고 그대로 사용합니다.
+        """
+        if isinstance(meta_data, (bytes, bytearray)):
+            meta_json = meta_data.decode("utf-8")
+        elif isinstance(meta_data, str):
+            meta_json = meta_data
+        else:
+            # 들여쓰기 없이 압축 직렬화 (모델 이해에는 영향이 없고 입력 토큰 수를 줄임)
+            meta_json = orjson.dumps(meta_data).decode()
+        return f"$SCENE_NUMBER = {scene_number}\n\ninput meta: \n{meta_json}"
+
+    def _parse_result(self, result: Any, scene_number: str) -> Optional[Dict[str, Any]]:
         """
-        API 응답을 정리하고 JSON으로 파싱합니다.
+        API 응답을 장면 그래프로 변환합니다.
         
         Args:
-            raw (str): API 응답 문자열
+            result (Any): API 응답 (batch 응답 dict 또는 문자열)
+            scene_number (str): 장면 번호
             
         Returns:
-            Any: 파싱된 JSON 객체 또는 None
+            Optional[Dict[str, Any]]: 변환된 장면 그래프 또는 None (실패 시)
         """
-        if not isinstance(raw, str):
+        if isinstance(result, dict):
+            # batch 응답 형태인 경우
+            content = self._extract_message_content(result)
+        else:
+            # 개별 응답 형태인 경우
+            content = str(result)
+        
+        # JSON 파싱
+        scene_graph = self._clean_and_parse_scene_graph(content)
+        if not scene_graph:
+            logger.error(f"❌ 장면 {scene_number} 변환 실패: JSON 파싱 오류")
             return None
+        
+        # Scene Number 추가
+        if isinstance(scene_graph, dict):
+            scene_graph["Scene Number"] = scene_number
+        
+        logger.debug(f"✅ 장면 {scene_number} 변환 완료")
+        return scene_graph
 
-        s = raw.strip()
-        # 코드펜스 제거
-        s = re.sub(r"^```(?:json)?\s*|\s*```$", "", s, flags=re.IGNORECASE)
-
-        # 1차 파싱
-        try:
-            obj = json.loads(s)
-            # 응답이 또다른 문자열 JSON을 감싼 경우
-            if isinstance(obj, str):
-                try:
-                    return json.loads(obj)
-                except json.JSONDecodeError:
-                    return obj
-            return obj
-        except json.JSONDecodeError:
-            pass
-
-        # 바깥 JSON 블록만 추출해서 재시도
-        m = re.search(r'(\{.*\}|\[.*\])', s, flags=re.DOTALL)
-        if m:
-            try:
-                return json.loads(m.group(1))
-            except json.JSONDecodeError:
-                return None
-        return None
-    
-    def _extract_message_content(self, outer: dict) -> str:
+    def __call__(self, meta_data: MetaData, scene_number: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
-        OpenAIAssistantClient의 응답 구조에서 content를 추출합니다.
+        meta_data를 입력받아 API를 이용해서 장면 그래프로 변환합니다.
         
         Args:
-            outer (dict): API 응답 객체
+            meta_data (Dict[str, Any] | str | bytes): 변환할 메타 데이터 (이미 직렬화된 JSON도 가능)
+            scene_number (str, optional): 장면 번호. None이면 meta_data(dict)에서 추출
             
         Returns:
-            str: 추출된 content 문자열
+            Optional[Dict[str, Any]]: 변환된 장면 그래프 또는 None (실패 시)
         """
-        content = (
-            outer.get("response", {})
-                 .get("body", {})
-                 .get("choices", [{}])[0]
-                 .get("message", {})
-                 .get("content", "")
-        )
-        if isinstance(content, str):
-            return content
-        # content가 list[dict] (예: [{"type":"text","text":"..."}]) 형태일 수도 있음
-        if isinstance(content, list):
-            texts = []
-            for part in content:
-                if isinstance(part, dict):
-                    if "text" in part and isinstance(part["text"], str):
-                        texts.append(part["text"])
-                    elif "content" in part and isinstance(part["content"], str):
-                        texts.append(part["content"])
-            return "\n".join(texts).strip()
-        # 기타 타입은 문자열 변환
-        return str(content)
-    
-    def __call__(self, meta_data: Dict[str, Any], scene_number: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        logger.debug(f"[MetaToGraphConverter] __call__ 메서드 호출됨 - meta_data: {type(meta_data)}")
+        logger.debug(f"[MetaToGraphConverter] scene_number: {scene_number}")
+        
+        try:
+            scene_number = self._get_scene_number(meta_data, scene_number)
+            cache_key = self._cache_key(meta_data, scene_number)
+            scene_graph = self._cache_get(cache_key)
+            if scene_graph is not None:
+                logger.debug(f"✅ 장면 {scene_number} 캐시 사용")
+                return scene_graph
+
+            user_message = self._build_user_message(meta_data, scene_number)
+            
+            # API 호출 (instruction은 assistant에 system instruction으로 등록되어 있음)
+            logger.debug(f"🚀 장면 {scene_number} 변환 중...")
+            result = self.assistant_client(user_message)
+            scene_graph = self._parse_result(result, scene_number)
+            if scene_graph:
+                self._cache_put(cache_key, scene_graph)
+            return scene_graph
+            
+        except Exception as e:
+            logger.error(f"❌ 장면 {scene_number} 변환 중 오류 발생: {e}")
+            return None
+
+    async def acall(self, meta_data: MetaData, scene_number: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
-        meta_data를 입력받아 API를 이용해서 장면 그래프로 변환합니다.
+        __call__의 비동기 버전 (AsyncOpenAI로 요청하여 여러 장면을 동시에 처리할 수 있음)
         
         Args:
-            meta_data (Dict[str, Any]): 변환할 메타 데이터
-            scene_number (str, optional): 장면 번호. None이면 meta_data에서 추출
+            meta_data (Dict[str, Any] | str | bytes): 변환할 메타 데이터 (이미 직렬화된 JSON도 가능)
+            scene_number (str, optional): 장면 번호. None이면 meta_data(dict)에서 추출
             
         Returns:
             Optional[Dict[str, Any]]: 변환된 장면 그래프 또는 None (실패 시)
         """
-        print(f"[MetaToGraphConverter] __call__ 메서드 호출됨 - meta_data: {type(meta_data)}")
-        print(f"[MetaToGraphConverter] scene_number: {scene_number}")
-        
         try:
-            # scene_number 추출
-            if scene_number is None:
-                scene_number = meta_data.get("Scene Number")
-                if not scene_number:
-                    raise ValueError("meta_data에 'Scene Number'가 없거나 scene_number 파라미터를 전달해야 합니다.")
-            
-            # instruction 생성
-            scene_instruction = (
-                self.instruction.replace("$SCENE_NUMBER", scene_number)
-                + "\n\ninput meta: \n"
-                + json.dumps(meta_data, ensure_ascii=False, indent=2)
-            )
-            
-            # API 호출
-            print(f"🚀 장면 {scene_number} 변환 중...")
-            result = self.assistant_client(scene_instruction)
+            scene_number = self._get_scene_number(meta_data, scene_number)
+            cache_key = self._cache_key(meta_data, scene_number)
+            scene_graph = self._cache_get(cache_key)
+            if scene_graph is not None:
+                logger.debug(f"✅ 장면 {scene_number} 캐시 사용")
+                return scene_graph
+
+            user_message = self._build_user_message(meta_data, scene_number)
             
-            # 응답 처리
-            if isinstance(result, dict):
-                # batch 응답 형태인 경우
-                content = self._extract_message_content(result)
+            logger.debug(f"🚀 장면 {scene_number} 변환 중...")
+            if self.use_raw_aiohttp:
+                result = await self._submit_one(user_message)
             else:
-                # 개별 응답 형태인 경우
-                content = str(result)
-            
-            # JSON 파싱
-            scene_graph = self._clean_and_parse_scene_graph(content)
-            if not scene_graph:
-                print(f"❌ 장면 {scene_number} 변환 실패: JSON 파싱 오류")
-                return None
-            
-            # Scene Number 추가
-            if isinstance(scene_graph, dict):
-                scene_graph["Scene Number"] = scene_number
-            
-            print(f"✅ 장면 {scene_number} 변환 완료")
+                result = await self.assistant_client.acall(user_message)
+            scene_graph = self._parse_result(result, scene_number)
+            if scene_graph:
+                self._cache_put(cache_key, scene_graph)
             return scene_graph
             
         except Exception as e:
-            print(f"❌ 장면 {scene_number} 변환 중 오류 발생: {e}")
+            logger.error(f"❌ 장면 {scene_number} 변환 중 오류 발생: {e}")
             return None
+
+    async def amap(self, meta_data_list: List[Dict[str, Any]], concurrency: int = 32) -> List[Optional[Dict[str, Any]]]:
+        """
+        여러 meta_data를 동시에 변환합니다 (동시 요청 수는 concurrency로 제한).
+        
+        Args:
+            meta_data_list (List[Dict[str, Any]]): 변환할 메타 데이터 리스트
+            concurrency (int): 최대 동시 요청 수
+            
+        Returns:
+            List[Optional[Dict[str, Any]]]: 입력 순서대로의 장면 그래프 리스트 (실패한 항목은 None)
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _convert(meta_data):
+            async with semaphore:
+                return await self.acall(meta_data)
+
+        results = await asyncio.gather(*[_convert(meta_data) for meta_data in meta_data_list], return_exceptions=True)
+        return [None if isinstance(result, BaseException) else result for result in results]
     
     def batch_call(self, meta_data_list: list[Dict[str, Any]]) -> list[Optional[Dict[str, Any]]]:
         """
@@ -211,73 +477,147 @@ class MetaToGraphConverter:
         if not meta_data_list:
             return []
         
-        results = []
+        results = [None] * len(meta_data_list)
         prompts = []
+        pending = []  # 배치로 요청할 프롬프트별 ([원래 인덱스들], 캐시 키)
+        pending_pos = {}  # 캐시 키 -> pending 위치 (동일한 프롬프트는 한 번만 요청)
         
-        # 프롬프트 생성
-        for meta_data in meta_data_list:
+        # 캐시 조회 및 프롬프트 생성
+        for idx, meta_data in enumerate(meta_data_list):
             scene_number = meta_data.get("Scene Number")
             if not scene_number:
-                print(f"⚠️ Scene Number 누락된 메타 데이터 건너뜀")
-                results.append(None)
-                prompts.append("")
+                logger.warning(f"⚠️ Scene Number 누락된 메타 데이터 건너뜀")
+                continue
+
+            cache_key = self._cache_key(meta_data, scene_number)
+            if cache_key in pending_pos:
+                # 같은 장면 번호/메타 데이터가 이미 요청 목록에 있으면 결과만 공유
+                pending[pending_pos[cache_key]][0].append(idx)
+                continue
+
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                results[idx] = cached
                 continue
                 
-            scene_instruction = (
-                self.instruction.replace("$SCENE_NUMBER", scene_number)
-                + "\n\ninput meta: \n"
-                + json.dumps(meta_data, ensure_ascii=False, indent=2)
-            )
-            prompts.append(scene_instruction)
+            # (system, user) 메시지 쌍으로 전달
+            prompts.append((self.instruction, self._build_user_message(meta_data, scene_number)))
+            pending_pos[cache_key] = len(pending)
+            pending.append(([idx], cache_key))
         
-        # 배치 API 호출
-        print(f"🚀 배치 변환 시작 (총 {len(meta_data_list)}개)")
+        # 배치 API 호출 (캐시에 없는 항목만)
+        logger.info(f"🚀 배치 변환 시작 (총 {len(meta_data_list)}개, 요청 {len(prompts)}개)")
+        if not prompts:
+            logger.info(f"🎉 배치 변환 완료 (성공: {len([r for r in results if r is not None])}/{len(meta_data_list)})")
+            return results
+
         try:
-            raw_response = self.assistant_client.run_batch_job(prompts)
-            
-            # 응답 처리
-            lines = raw_response.strip().splitlines()
-            if len(lines) != len(meta_data_list):
-                print(f"⚠️ 응답 개수({len(lines)})와 요청 개수({len(meta_data_list)}) 불일치")
-            
-            for idx, line in enumerate(lines):
+            # 결과 파일을 한 줄씩 파싱하며 처리 (전체 응답을 메모리에 올리지 않음)
+            # batch 결과는 입력 순서가 보장되지 않으므로 custom_id(req_<timestamp>_<순번>)의 순번으로 매칭
+            def apply_result(custom_id, scene_graph):
+                """파싱된 결과를 원래 인덱스(중복 포함)에 반영하고 캐시에 저장"""
+                if not scene_graph:
+                    return
                 try:
-                    if idx >= len(meta_data_list):
-                        break
-                        
-                    outer = json.loads(line)
-                    content = self._extract_message_content(outer)
-                    if not content:
-                        results.append(None)
-                        continue
-
-                    scene_graph = self._clean_and_parse_scene_graph(content)
-                    if not scene_graph:
-                        results.append(None)
-                        continue
-
-                    # Scene Number 추가
-                    scene_number = meta_data_list[idx].get("Scene Number")
-                    if isinstance(scene_graph, dict) and scene_number:
-                        scene_graph["Scene Number"] = scene_number
-                    
-                    results.append(scene_graph)
-                    
-                except Exception as e:
-                    print(f"❌ 응답 {idx} 처리 오류: {e}")
-                    results.append(None)
-            
-            # 결과 개수 맞추기
-            while len(results) < len(meta_data_list):
-                results.append(None)
+                    indices, cache_key = pending[int(custom_id.rsplit("_", 1)[1])]
+                except (AttributeError, ValueError, IndexError):
+                    logger.error(f"❌ 알 수 없는 custom_id: {custom_id}")
+                    return
+
+                # Scene Number 추가
+                scene_number = meta_data_list[indices[0]].get("Scene Number")
+                if isinstance(scene_graph, dict) and scene_number:
+                    scene_graph["Scene Number"] = scene_number
+                
+                results[indices[0]] = scene_graph
+                # 중복 항목에는 복사본을 전달 (결과를 수정해도 서로 영향 없도록)
+                for idx in indices[1:]:
+                    results[idx] = copy.deepcopy(scene_graph)
+                self._cache_put(cache_key, scene_graph)
+
+            received = 0
+            batch_results = self.assistant_client.run_batch_job_iter(prompts)
+            # Celery prefork 워커 같은 daemon 프로세스는 자식 프로세스를 만들 수 없으므로 순차 처리
+            if len(prompts) >= PARALLEL_PARSE_THRESHOLD and not multiprocessing.current_process().daemon:
+                with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                    parsed = pool.map(_parse_batch_result, batch_results, chunksize=64)
+                    for custom_id, scene_graph in tqdm(parsed, total=len(prompts), desc="parsing"):
+                        received += 1
+                        apply_result(custom_id, scene_graph)
+            else:
+                # 결과 파일 읽기(메인 스레드)와 응답 파싱/반영(consumer 스레드)을 겹쳐서 처리
+                line_queue = queue.Queue(maxsize=256)
+                sentinel = object()
+
+                def consumer():
+                    while True:
+                        outer = line_queue.get()
+                        if outer is sentinel:
+                            break
+                        try:
+                            apply_result(*_parse_batch_result(outer))
+                        except Exception as e:
+                            logger.error(f"❌ 응답 처리 오류: {e}")
+
+                worker = threading.Thread(target=consumer, name="batch-parse", daemon=True)
+                worker.start()
+                try:
+                    for outer in tqdm(batch_results, total=len(prompts), desc="parsing"):
+                        received += 1
+                        line_queue.put(outer)
+                finally:
+                    line_queue.put(sentinel)
+                    worker.join()
+
+            if received != len(prompts):
+                logger.warning(f"⚠️ 응답 개수({received})와 요청 개수({len(prompts)}) 불일치")
                 
         except Exception as e:
-            print(f"❌ 배치 처리 중 오류 발생: {e}")
-            results = [None] * len(meta_data_list)
+            logger.error(f"❌ 배치 처리 중 오류 발생: {e}")
         
-        print(f"🎉 배치 변환 완료 (성공: {len([r for r in results if r is not None])}/{len(meta_data_list)})")
+        logger.info(f"🎉 배치 변환 완료 (성공: {len([r for r in results if r is not None])}/{len(meta_data_list)})")
         return results
     
+    async def _get_session(self):
+        """인스턴스당 하나의 aiohttp 세션을 재사용 (aiohttp는 이 모드에서만 필요하므로 지연 import)"""
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.aiohttp_limit),
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                json_serialize=lambda obj: orjson.dumps(obj).decode(),
+            )
+        return self._session
+
+    async def _submit_one(self, user_message: str) -> Dict[str, Any]:
+        """
+        OpenAI SDK를 거치지 않고 /v1/chat/completions에 직접 요청합니다.
+        
+        Args:
+            user_message (str): 장면별 user 메시지 (instruction은 system 메시지로 전달)
+            
+        Returns:
+            Dict[str, Any]: _extract_message_content가 처리하는 batch 응답과 같은 형태 ({"response": {"body": ...}})
+        """
+        session = await self._get_session()
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.instruction},
+                {"role": "user", "content": user_message},
+            ],
+        }
+        async with session.post(CHAT_COMPLETIONS_URL, json=payload) as resp:
+            resp.raise_for_status()
+            body = await resp.json(loads=orjson.loads)
+        return {"response": {"body": body}}
+
+    async def aclose(self):
+        """use_raw_aiohttp 모드에서 사용한 aiohttp 세션 종료"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
     def save_scene_graph(self, scene_graph: Dict[str, Any], output_path: str) -> bool:
         """
         장면 그래프를 파일로 저장합니다.
@@ -294,14 +634,45 @@ class MetaToGraphConverter:
             Path(output_path).parent.mkdir(parents=True, exist_ok=True)
             
             # 파일 저장
-            with open(output_path, "w", encoding="utf-8", newline="") as f:
-                json.dump(scene_graph, f, indent=4, ensure_ascii=False)
+            with open(output_path, "wb") as f:
+                f.write(orjson.dumps(scene_graph, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
             
-            print(f"✅ 저장 완료: {output_path}")
+            logger.debug(f"✅ 저장 완료: {output_path}")
             return True
             
         except Exception as e:
-            print(f"❌ 저장 실패 ({output_path}): {e}")
+            logger.error(f"❌ 저장 실패 ({output_path}): {e}")
             return False
 
+    async def save_scene_graph_async(self, scene_graph: Dict[str, Any], output_path: str) -> bool:
+        """
+        save_scene_graph의 비동기 버전 (파일 쓰기를 스레드에서 실행하여 이벤트 루프를 막지 않음)
+        
+        Args:
+            scene_graph (Dict[str, Any]): 저장할 장면 그래프
+            output_path (str): 저장할 파일 경로
+            
+        Returns:
+            bool: 저장 성공 여부
+        """
+        return await asyncio.to_thread(self.save_scene_graph, scene_graph, output_path)
+
+    async def save_many(self, scene_graphs: List[Dict[str, Any]], output_paths: List[str], concurrency: int = 32) -> List[bool]:
+        """
+        여러 장면 그래프를 동시에 저장합니다 (동시에 여는 파일 수는 concurrency로 제한).
+        
+        Args:
+            scene_graphs (List[Dict[str, Any]]): 저장할 장면 그래프 리스트
+            output_paths (List[str]): 각 장면 그래프를 저장할 파일 경로 리스트
+            concurrency (int): 최대 동시 저장 수
+            
+        Returns:
+            List[bool]: 입력 순서대로의 저장 성공 여부
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _save(scene_graph, output_path):
+            async with semaphore:
+                return await self.save_scene_graph_async(scene_graph, output_path)
 
+        return await asyncio.gather(*[_save(g, p) for g, p in zip(scene_graphs, output_paths)])
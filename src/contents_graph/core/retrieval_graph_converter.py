@@ -9,7 +9,7 @@ import ast
 import yaml
 import torch
 import heapq
-import json
+import orjson
 import time
 from pathlib import Path
 from typing import List, Optional, Tuple, Any
@@ -209,7 +209,7 @@ class RetrievalGraphConverter:
             js_fp = JSON_ROOT / rel_path
             if not js_fp.exists(): 
                 continue
-            scene_triples = self._triples_in_scene(json.load(js_fp.open()))
+            scene_triples = self._triples_in_scene(orjson.loads(js_fp.read_bytes()))
             if not scene_triples: 
                 continue
 
@@ -4,18 +4,136 @@ SceneGraphAnalyzer 클래스
 장면 그래프 JSON을 입력으로 받아 RGCN을 통해 노드 임베딩을 생성하는 모듈
 """
 
+import copy
 import json
+import hashlib
+import threading
+import numpy as np
+import orjson
 import torch
 import torch.nn.functional as F
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 from torch_geometric.data import HeteroData, Data
 from torch_geometric.nn import RGCNConv
 from sentence_transformers import SentenceTransformer
 
 
+class EmbeddingLRUCache:
+    """
+    텍스트 임베딩 LRU 캐시 (스레드 안전, 최대 개수 제한)
+    메모리를 줄이기 위해 CPU fp16으로 저장하고 조회 시 fp32로 변환합니다.
+    """
+    
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str], torch.Tensor]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple[str, str]) -> Optional[torch.Tensor]:
+        with self._lock:
+            emb = self._data.get(key)
+            if emb is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        return emb.float()
+    
+    def put(self, key: Tuple[str, str], emb: torch.Tensor) -> None:
+        emb = emb.detach().to("cpu", torch.float16)
+        with self._lock:
+            self._data[key] = emb
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, float]:
+        """캐시 크기와 적중률"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class AnalysisResultLRUCache:
+    """
+    analyze_scene_graph 결과 LRU 캐시 (스레드 안전, 최대 개수 제한)
+    같은 장면 그래프(재시도, 중복 요청)는 SBERT/RGCN을 다시 계산하지 않고 저장된 결과를 반환합니다.
+    numpy 배열은 읽기 전용으로 만들어 복사 없이 공유하고, dict/list 값(node_info 등)은 깊은 복사로 분리합니다.
+    """
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple[str, str, bytes], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Tuple[str, str, bytes]) -> Optional[Dict]:
+        with self._lock:
+            result = self._data.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+        # 호출자가 결과를 수정해도 캐시에 영향이 없도록 복사본 반환 (배열은 읽기 전용이라 그대로 공유)
+        return self._copy(result)
+    
+    def put(self, key: Tuple[str, str, bytes], result: Dict) -> None:
+        # 캐시된 배열을 호출자가 제자리 수정(정규화 등)하지 못하도록 읽기 전용으로 설정
+        # (put 이후 원본 result의 배열도 읽기 전용이 됨)
+        for value in result.values():
+            if isinstance(value, np.ndarray):
+                value.setflags(write=False)
+        cached = self._copy(result)
+        with self._lock:
+            self._data[key] = cached
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    @staticmethod
+    def _copy(result: Dict) -> Dict:
+        """결과 dict 복사 (읽기 전용 numpy 배열은 공유, 그 외 값은 깊은 복사)"""
+        return {
+            name: value if isinstance(value, np.ndarray) else copy.deepcopy(value)
+            for name, value in result.items()
+        }
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# 동종 그래프의 노드 타입 순서 (node_type 값 = 인덱스)
+NODE_TYPES = ("scene", "object", "event", "spatial")
+
+# 노드 참조 dict에서 ID를 찾을 키 (우선순위 순서)
+_ID_KEYS = ("object_id", "event_id", "spatial_id", "temporal_id")
+
+# 노드 텍스트 템플릿 (바운드 str.format을 재사용해 노드마다 f-string을 새로 해석하지 않음)
+_SCENE_TEXT_TEMPLATE = "place {} time {} atmosphere {}".format
+_OBJECT_TEXT_TEMPLATE = "A {} which is a kind of {}.".format
+
+# 분석기 인스턴스(요청) 간에 공유하는 텍스트 임베딩 캐시 (키: (SBERT 모델명, 텍스트))
+_TEXT_EMBED_CACHE = EmbeddingLRUCache(maxsize=10000)
+
+# 분석기 인스턴스 간에 공유하는 분석 결과 캐시 (키: (RGCN 모델 경로, SBERT 모델명, 장면 그래프 JSON 다이제스트))
+_RESULT_CACHE = AnalysisResultLRUCache(maxsize=256)
+
+
 class SceneGraphAnalyzer:
     """
     장면 그래프를 분석하여 노드 임베딩을 생성하는 클래스
@@ -25,7 +143,9 @@ class SceneGraphAnalyzer:
                  model_path: str = "model/embed_triplet_struct_ver1+2/best_model.pt",
                  edge_map_path: str = "config/graph/edge_type_map.json",
                  sbert_model: str = "sentence-transformers/all-MiniLM-L6-v2",
-                 device: Optional[str] = None):
+                 device: Optional[str] = None,
+                 encode_batch_size: int = 64,
+                 compile_model: bool = False):
         """
         SceneGraphAnalyzer 초기화
         
@@ -34,9 +154,13 @@ class SceneGraphAnalyzer:
             edge_map_path (str): 엣지 타입 매핑 파일 경로
             sbert_model (str): Sentence-BERT 모델명
             device (str, optional): 사용할 디바이스. None이면 자동 선택
+            encode_batch_size (int): Sentence-BERT encode 배치 크기
+            compile_model (bool): True면 RGCN 모델을 torch.compile로 컴파일 (첫 호출 시 컴파일 시간 소요)
         """
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
         self.sbert_model_name = sbert_model
+        self.encode_batch_size = encode_batch_size
+        self.compile_model = compile_model
         
         # 모델 파라미터 (학습 시와 동일하게 설정)
         self.IN_DIM = 384
@@ -54,14 +178,61 @@ class SceneGraphAnalyzer:
         with self.edge_map_path.open() as f:
             self.EDGE2ID: Dict[str, int] = json.load(f)
         
+        # 엣지 타입 ID -> (source_type, relation, dest_type) 디코딩 테이블 (엣지 타입별 버킷 인덱스로 사용)
+        self._num_rels = len(self.EDGE2ID)
+        self._rel_key_decoded: List[Tuple[Optional[str], Optional[str], Optional[str]]] = [(None, None, None)] * self._num_rels
+        for et_name, eid in self.EDGE2ID.items():
+            self._rel_key_decoded[eid] = self._decode_edge_key(et_name)
+        # (source_type, relation, dest_type) -> 엣지 타입 ID (엣지 추가 시 문자열 조합 없이 조회)
+        self._edge_key_to_id: Dict[Tuple[str, str, str], int] = {
+            key: eid for eid, key in enumerate(self._rel_key_decoded) if None not in key
+        }
+        
         # Sentence-BERT 모델 초기화
         self.sbert_model = SentenceTransformer(sbert_model, device=self.device).eval()
+        # GPU에서는 반정밀도로 실행 (Ampere 이상은 bf16, 그 외 fp16). 결과는 encode 후 fp32로 변환됨
+        if str(self.device).startswith("cuda"):
+            if torch.cuda.is_bf16_supported():
+                self.sbert_model = self.sbert_model.to(torch.bfloat16)
+            else:
+                self.sbert_model = self.sbert_model.half()
         
         # RGCN 모델 초기화
+        self.model_path = str(model_path)
         self.rgcn_model = self._load_rgcn_model(model_path)
         
-        # 텍스트 캐시 (중복 계산 방지)
-        self._text_cache: Dict[str, torch.Tensor] = {}
+        # 텍스트 임베딩 캐시 (중복 계산 방지, 인스턴스 간 공유되는 LRU)
+        self._text_cache = _TEXT_EMBED_CACHE
+        
+        # 분석 결과 캐시 (동일한 장면 그래프 재분석 방지)
+        self._result_cache = _RESULT_CACHE
+        
+        # GPU -> CPU 결과 복사용 pinned 호스트 버퍼 (CUDA에서만 사용, 필요 시 256행 단위로 확장)
+        self._host_buf: Optional[torch.Tensor] = None
+    
+    def _to_host_numpy(self, t: torch.Tensor) -> np.ndarray:
+        """
+        2차원 텐서를 CPU numpy 배열로 복사합니다. CUDA 텐서는 재사용하는 pinned 버퍼로 non_blocking 복사합니다.
+        
+        Args:
+            t (torch.Tensor): [N, D] 텐서
+            
+        Returns:
+            np.ndarray: [N, D] numpy 배열 (버퍼와 메모리를 공유하지 않는 사본)
+        """
+        if t.device.type != "cuda":
+            return t.cpu().numpy()
+        
+        n, d = t.shape
+        if self._host_buf is None or self._host_buf.size(0) < n or self._host_buf.size(1) != d or self._host_buf.dtype != t.dtype:
+            rows = (n + 255) // 256 * 256
+            self._host_buf = torch.empty((rows, d), dtype=t.dtype, pin_memory=True)
+        
+        host = self._host_buf[:n]
+        host.copy_(t, non_blocking=True)
+        torch.cuda.current_stream(t.device).synchronize()
+        # 버퍼는 다음 호출에서 덮어쓰므로 결과(캐시에도 저장됨)는 사본으로 반환
+        return host.numpy().copy()
     
     def _load_rgcn_model(self, model_path: str) -> torch.nn.Module:
         """
@@ -80,12 +251,20 @@ class SceneGraphAnalyzer:
         model = RGCN(num_rel, self.IN_DIM, self.HIDDEN, self.OUT_DIM, 
                     self.NUM_BASES, self.HOP, self.SELF_WEIGHT)
         
-        model.load_state_dict(torch.load(model_path, map_location=self.device))
-        model.to(self.device).eval()
+        # 가중치를 CPU에 mmap으로 로드해 호스트 메모리 전체 복사를 피하고, 디바이스로는 한 번만 이동
+        state_dict = torch.load(model_path, map_location="cpu", mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, assign=True)
+        model = model.to(self.device).eval()
+        
+        # 노드 수가 장면마다 달라지므로 dynamic shape로 컴파일, 실패하면 eager 모델 사용
+        if self.compile_model and hasattr(torch, "compile"):
+            try:
+                model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+            except Exception as e:
+                print(f"[WARN] torch.compile 실패, eager 모드로 실행합니다: {e}")
         
         return model
     
-    @torch.no_grad()
     def _embed_text(self, text: str) -> torch.Tensor:
         """
         텍스트를 Sentence-BERT로 임베딩합니다.
@@ -96,14 +275,47 @@ class SceneGraphAnalyzer:
         Returns:
             torch.Tensor: 임베딩 벡터
         """
-        if text not in self._text_cache:
-            embedding = self.sbert_model.encode(
-                text, 
-                normalize_embeddings=True
-            )
-            self._text_cache[text] = torch.tensor(embedding, dtype=torch.float32)
+        return self._embed_texts_batch([text])[text]
+    
+    @torch.inference_mode()
+    def _embed_texts_batch(self, texts: List[str]) -> Dict[str, torch.Tensor]:
+        """
+        텍스트들을 임베딩합니다. 캐시에 없는 텍스트만 Sentence-BERT encode 한 번으로 계산합니다.
         
-        return self._text_cache[text]
+        Args:
+            texts (List[str]): 임베딩할 텍스트 리스트 (중복 허용)
+            
+        Returns:
+            Dict[str, torch.Tensor]: 텍스트별 임베딩 벡터 (fp32)
+        """
+        result: Dict[str, torch.Tensor] = {}
+        needed = []
+        # 중복 제거 (순서 유지) 후 캐시 조회
+        for text in dict.fromkeys(texts):
+            emb = self._text_cache.get((self.sbert_model_name, text))
+            if emb is None:
+                needed.append(text)
+            else:
+                result[text] = emb
+        if not needed:
+            return result
+        
+        # 전체 리스트를 한 번에 넘기면 sentence-transformers가 길이순 정렬 후 배치를 나누고
+        # 원래 순서로 되돌려 주므로(smart batching) 패딩 낭비가 최소화됨
+        embeddings = self.sbert_model.encode(
+            needed,
+            batch_size=self.encode_batch_size,
+            convert_to_tensor=True,
+            normalize_embeddings=True
+        ).float().cpu()
+        for text, emb in zip(needed, embeddings):
+            result[text] = emb
+            self._text_cache.put((self.sbert_model_name, text), emb)
+        return result
+    
+    def text_cache_stats(self) -> Dict[str, float]:
+        """텍스트 임베딩 캐시 적중률 등 통계"""
+        return self._text_cache.stats()
     
     def _preprocess_scene_text(self, meta: Dict) -> str:
         """
@@ -115,7 +327,7 @@ class SceneGraphAnalyzer:
         Returns:
             str: 전처리된 장면 텍스트
         """
-        scene_txt = f"place {meta.get('scene_place', '')} time {meta.get('scene_time', '')} atmosphere {meta.get('scene_atmosphere', '')}".strip()
+        scene_txt = _SCENE_TEXT_TEMPLATE(meta.get('scene_place', ''), meta.get('scene_time', ''), meta.get('scene_atmosphere', '')).strip()
         return scene_txt or "scene"
     
     def _preprocess_object_text(self, obj: Dict) -> str:
@@ -128,7 +340,7 @@ class SceneGraphAnalyzer:
         Returns:
             str: 전처리된 객체 텍스트
         """
-        return f"A {obj.get('type of', '')} which is a kind of {obj.get('super_type', '')}."
+        return _OBJECT_TEXT_TEMPLATE(obj.get('type of', ''), obj.get('super_type', ''))
     
     def _preprocess_event_text(self, event: Dict) -> str:
         """
@@ -164,10 +376,18 @@ class SceneGraphAnalyzer:
         Returns:
             Optional[int]: 추출된 ID
         """
+        if type(x) is int:
+            return x
         if isinstance(x, dict):
-            for k in ("object_id", "event_id", "spatial_id", "temporal_id"):
+            # 이벤트의 subject/object는 대부분 object_id/event_id를 가지므로 먼저 확인
+            if "object_id" in x:
+                return x["object_id"]
+            if "event_id" in x:
+                return x["event_id"]
+            for k in _ID_KEYS[2:]:
                 if k in x:
                     return x[k]
+            return None
         if isinstance(x, int):
             return x
         return None
@@ -191,7 +411,7 @@ class SceneGraphAnalyzer:
         return st, rel, dt
     
     def _safe_add_edge(self, src_id: int, dst_id: int, rel: str, 
-                      nid_map: Dict, edge_idx_dict: Dict, edge_typ_dict: Dict,
+                      nid_map: Dict, edges: List,
                       file_name: str = "(unknown)", event_id: Optional[int] = None):
         """
         안전하게 엣지를 추가합니다.
@@ -201,149 +421,219 @@ class SceneGraphAnalyzer:
             dst_id (int): 대상 노드 ID
             rel (str): 관계명
             nid_map (Dict): 노드 ID 매핑
-            edge_idx_dict (Dict): 엣지 인덱스 딕셔너리
-            edge_typ_dict (Dict): 엣지 타입 딕셔너리
+            edges (List): (엣지 타입 ID, 소스 인덱스, 대상 인덱스)를 모으는 리스트
             file_name (str): 파일명 (디버깅용)
             event_id (Optional[int]): 이벤트 ID (디버깅용)
         """
-        if src_id not in nid_map or dst_id not in nid_map:
+        src = nid_map.get(src_id)
+        dst = nid_map.get(dst_id)
+        if src is None or dst is None:
             return
         
-        st, si = nid_map[src_id]
-        dt, di = nid_map[dst_id]
-        rel_name = f"{st}_{rel}_{dt}"
+        st, si = src
+        dt, di = dst
+        eid = self._edge_key_to_id.get((st, rel, dt))
         
-        if rel_name not in self.EDGE2ID:
-            print(f"[skip] unknown rel_name: {rel_name} | file={file_name} | ev_id={event_id}")
+        if eid is None:
+            print(f"[skip] unknown rel_name: {st}_{rel}_{dt} | file={file_name} | ev_id={event_id}")
             return
         
-        eid = self.EDGE2ID[rel_name]
-        edge_idx_dict[(st, rel, dt)].append([si, di])
-        edge_typ_dict[(st, rel, dt)].append(eid)
+        edges.append((eid, si, di))
     
-    def json_to_hetero_data(self, scene_graph_json: Dict, file_name: str = "(unknown)") -> Optional[HeteroData]:
+    def _collect_graph(self, scene_graph_json: Dict, file_name: str = "(unknown)") -> Optional[Dict]:
         """
-        장면 그래프 JSON을 HeteroData로 변환합니다.
+        장면 그래프 JSON에서 노드 특성/라벨/ID와 엣지 목록을 추출합니다. (HeteroData와 동종 그래프 생성에서 공용)
         
         Args:
             scene_graph_json (Dict): 장면 그래프 JSON
             file_name (str): 파일명 (디버깅용)
             
         Returns:
-            Optional[HeteroData]: 변환된 이종 그래프 데이터
+            Optional[Dict]: {"feats", "labels", "ids", "edges"} 또는 None (형식 오류)
+                - feats/labels/ids: 노드 타입별 리스트 (타입 내 인덱스 순서)
+                - edges: (엣지 타입 ID, 소스 타입 내 인덱스, 대상 타입 내 인덱스) 리스트
         """
         if not isinstance(scene_graph_json, dict) or "scene_graph" not in scene_graph_json:
             return None
         
         g = scene_graph_json["scene_graph"]
-        data, nid_map = HeteroData(), {}
+        nid_map = {}
         
-        # 장면 노드 처리
+        # 모든 노드 텍스트를 먼저 모아 한 번의 encode로 임베딩 (이후에는 캐시에서 조회)
         meta = g.get("meta", {})
         scene_txt = self._preprocess_scene_text(meta)
-        data["scene"].x = self._embed_text(scene_txt).unsqueeze(0)
-        data["scene"].node_type = torch.full((1,), 0)
-        data["scene"].node_ids = [50000]  # scene 노드 ID
+        obj_texts = [_OBJECT_TEXT_TEMPLATE(o.get("type of", ""), o.get("super_type", "")) for o in g.get("objects", [])]
+        evt_texts = [ev.get("verb", "") for ev in g.get("events", [])]
+        spat_texts = [sp.get("predicate", "") for sp in g.get("spatial", [])]
+        text_embs = self._embed_texts_batch([scene_txt] + obj_texts + evt_texts + spat_texts)
+        
+        # 장면 노드 처리
         scene_idx = 0
         
         # 객체 노드 처리
-        obj_feats = []
         obj_types = []
         obj_ids = []
         for o in g.get("objects", []):
-            text = self._preprocess_object_text(o)
-            obj_feats.append(self._embed_text(text))
             obj_types.append(o.get("type of", "unknown"))
             obj_ids.append(o["object_id"])
-            nid_map[o["object_id"]] = ("object", len(obj_feats) - 1)
-        
-        data["object"].x = torch.stack(obj_feats) if obj_feats else torch.empty((0, 384))
-        data["object"].node_type = torch.full((len(obj_feats),), 1)
-        data["object"].label_text = obj_types
-        data["object"].node_ids = obj_ids
+            nid_map[o["object_id"]] = ("object", len(obj_ids) - 1)
         
         # 이벤트 노드 처리
-        evt_feats = []
         evt_verbs = []
         evt_ids = []
         for ev in g.get("events", []):
-            text = self._preprocess_event_text(ev)
-            evt_feats.append(self._embed_text(text))
             evt_verbs.append(ev.get("verb", "unknown"))
             evt_ids.append(ev["event_id"])
-            nid_map[ev["event_id"]] = ("event", len(evt_feats) - 1)
-        
-        data["event"].x = torch.stack(evt_feats) if evt_feats else torch.empty((0, 384))
-        data["event"].node_type = torch.full((len(evt_feats),), 2)
-        data["event"].label_text = evt_verbs
-        data["event"].node_ids = evt_ids
+            nid_map[ev["event_id"]] = ("event", len(evt_ids) - 1)
         
         # 공간 관계 노드 처리
-        spat_feats = []
         spat_preds = []
         for sp in g.get("spatial", []):
-            text = self._preprocess_spatial_text(sp)
-            spat_feats.append(self._embed_text(text))
             spat_preds.append(sp.get("predicate", "unknown"))
-            nid_map[sp["spatial_id"]] = ("spatial", len(spat_feats) - 1)
-        
-        data["spatial"].x = torch.stack(spat_feats) if spat_feats else torch.empty((0, 384))
-        data["spatial"].node_type = torch.full((len(spat_feats),), 3)
-        data["spatial"].label_text = spat_preds
+            nid_map[sp["spatial_id"]] = ("spatial", len(spat_preds) - 1)
         
-        # 엣지 생성
-        edge_idx_dict, edge_typ_dict = defaultdict(list), defaultdict(list)
+        # 엣지 생성 (검증된 엣지를 평탄한 리스트에 모음)
+        edges = []
         
         # 장면과 다른 노드들 간의 엣지
         for o in g.get("objects", []):
-            self._safe_add_edge(scene_idx, o["object_id"], "in_scene", nid_map, edge_idx_dict, edge_typ_dict, file_name)
-            self._safe_add_edge(o["object_id"], scene_idx, "to_scene", nid_map, edge_idx_dict, edge_typ_dict, file_name)
+            self._safe_add_edge(scene_idx, o["object_id"], "in_scene", nid_map, edges, file_name)
+            self._safe_add_edge(o["object_id"], scene_idx, "to_scene", nid_map, edges, file_name)
         
         for ev in g.get("events", []):
-            self._safe_add_edge(scene_idx, ev["event_id"], "in_scene", nid_map, edge_idx_dict, edge_typ_dict, file_name)
-            self._safe_add_edge(ev["event_id"], scene_idx, "to_scene", nid_map, edge_idx_dict, edge_typ_dict, file_name)
+            self._safe_add_edge(scene_idx, ev["event_id"], "in_scene", nid_map, edges, file_name)
+            self._safe_add_edge(ev["event_id"], scene_idx, "to_scene", nid_map, edges, file_name)
             
             # 이벤트와 객체 간의 엣지
             subj = self._extract_id(ev.get("subject"))
             obj = self._extract_id(ev.get("object"))
             
             if subj is not None:
-                self._safe_add_edge(subj, ev["event_id"], "subject_of_event", nid_map, edge_idx_dict, edge_typ_dict, file_name, ev.get("event_id"))
+                self._safe_add_edge(subj, ev["event_id"], "subject_of_event", nid_map, edges, file_name, ev.get("event_id"))
             
             if obj is not None and nid_map.get(obj, (None,))[0] == "object":
-                self._safe_add_edge(ev["event_id"], obj, "object_of_event", nid_map, edge_idx_dict, edge_typ_dict, file_name, ev.get("event_id"))
+                self._safe_add_edge(ev["event_id"], obj, "object_of_event", nid_map, edges, file_name, ev.get("event_id"))
         
         # 공간 관계 엣지
         for sp in g.get("spatial", []):
-            self._safe_add_edge(sp["subject"], sp["spatial_id"], "subject_of_spatial", nid_map, edge_idx_dict, edge_typ_dict, file_name)
+            self._safe_add_edge(sp["subject"], sp["spatial_id"], "subject_of_spatial", nid_map, edges, file_name)
             obj_id = sp.get("object", None)
             if isinstance(obj_id, int) and nid_map.get(obj_id, (None,))[0] == "object":
-                self._safe_add_edge(sp["spatial_id"], obj_id, "object_of_spatial", nid_map, edge_idx_dict, edge_typ_dict, file_name)
+                self._safe_add_edge(sp["spatial_id"], obj_id, "object_of_spatial", nid_map, edges, file_name)
         
         # 시간 관계 엣지
         for tm in g.get("temporal", []):
-            self._safe_add_edge(tm["subject"], tm["object"], "before", nid_map, edge_idx_dict, edge_typ_dict, file_name)
+            self._safe_add_edge(tm["subject"], tm["object"], "before", nid_map, edges, file_name)
+        
+        return {
+            "feats": {
+                "scene": [text_embs[scene_txt]],
+                "object": [text_embs[t] for t in obj_texts],
+                "event": [text_embs[t] for t in evt_texts],
+                "spatial": [text_embs[t] for t in spat_texts],
+            },
+            "labels": {"object": obj_types, "event": evt_verbs, "spatial": spat_preds},
+            "ids": {"scene": [50000], "object": obj_ids, "event": evt_ids},  # scene 노드 ID는 50000
+            "edges": edges,
+        }
+    
+    def json_to_hetero_data(self, scene_graph_json: Dict, file_name: str = "(unknown)") -> Optional[HeteroData]:
+        """
+        장면 그래프 JSON을 HeteroData로 변환합니다.
         
-        # 엣지 데이터 설정
-        for key, pairs in edge_idx_dict.items():
-            et_name = f"{key[0]}_{key[1]}_{key[2]}"
-            eid = self.EDGE2ID[et_name]
-            data[key].edge_index = torch.tensor(pairs, dtype=torch.long).t()
-            data[key].edge_type = torch.full((len(pairs),), eid, dtype=torch.long)
+        Args:
+            scene_graph_json (Dict): 장면 그래프 JSON
+            file_name (str): 파일명 (디버깅용)
+            
+        Returns:
+            Optional[HeteroData]: 변환된 이종 그래프 데이터
+        """
+        graph = self._collect_graph(scene_graph_json, file_name)
+        if graph is None:
+            return None
         
-        # 빈 엣지 타입들 초기화
-        for et_name, eid in self.EDGE2ID.items():
-            st, rel, dt = self._decode_edge_key(et_name)
-            if None in (st, rel, dt):
+        data = HeteroData()
+        feats, labels, ids = graph["feats"], graph["labels"], graph["ids"]
+        for type_id, node_type in enumerate(NODE_TYPES):
+            data[node_type].x = torch.stack(feats[node_type]) if feats[node_type] else torch.empty((0, self.IN_DIM))
+            data[node_type].node_type = torch.full((len(feats[node_type]),), type_id)
+            if node_type in labels:
+                data[node_type].label_text = labels[node_type]
+            if node_type in ids:
+                data[node_type].node_ids = ids[node_type]
+        
+        # 엣지 타입 ID로 인덱싱한 버킷에 (src, dst) 쌍을 모음
+        edge_buckets = [[] for _ in range(self._num_rels)]
+        for eid, si, di in graph["edges"]:
+            edge_buckets[eid].append((si, di))
+        
+        # 엣지 데이터 설정 (numpy 배열로 만든 뒤 torch.from_numpy로 변환, 실제로 존재하는 엣지 타입만 추가)
+        for eid, pairs in enumerate(edge_buckets):
+            key = self._rel_key_decoded[eid]
+            if not pairs or None in key:
                 continue
-            key = (st, rel, dt)
-            if key not in data.edge_types:
-                data[key].edge_index = torch.empty((2, 0), dtype=torch.long)
-                data[key].edge_type = torch.full((0,), eid, dtype=torch.long)
+            data[key].edge_index = torch.from_numpy(np.ascontiguousarray(np.asarray(pairs, dtype=np.int64).T))
+            data[key].edge_type = torch.full((len(pairs),), eid, dtype=torch.long)
         
         return data
     
-    def analyze_scene_graph(self, scene_graph_json: Union[Dict, str, Path]) -> Dict[str, torch.Tensor]:
+    def json_to_homogeneous(self, scene_graph_json: Dict, file_name: str = "(unknown)") -> Optional[Dict]:
+        """
+        장면 그래프 JSON을 HeteroData를 거치지 않고 바로 동종 그래프 텐서로 변환합니다.
+        노드는 scene, object, event, spatial 순서로 배치됩니다. (HeteroData.to_homogeneous와 같은 순서)
+        
+        Args:
+            scene_graph_json (Dict): 장면 그래프 JSON
+            file_name (str): 파일명 (디버깅용)
+            
+        Returns:
+            Optional[Dict]: {"x", "edge_index", "edge_type", "node_type", "node_info", "node_labels"} 또는 None
+        """
+        graph = self._collect_graph(scene_graph_json, file_name)
+        if graph is None:
+            return None
+        
+        feats, labels, ids = graph["feats"], graph["labels"], graph["ids"]
+        counts = [len(feats[node_type]) for node_type in NODE_TYPES]
+        
+        # 노드 타입별 전역 인덱스 오프셋
+        offsets, total = {}, 0
+        for node_type, count in zip(NODE_TYPES, counts):
+            offsets[node_type] = total
+            total += count
+        
+        x = torch.stack([f for node_type in NODE_TYPES for f in feats[node_type]])
+        node_type_tensor = torch.repeat_interleave(torch.arange(len(NODE_TYPES)), torch.tensor(counts))
+        
+        # 엣지를 전역 인덱스로 변환
+        src, dst, types = [], [], []
+        for eid, si, di in graph["edges"]:
+            st, _, dt = self._rel_key_decoded[eid]
+            src.append(offsets[st] + si)
+            dst.append(offsets[dt] + di)
+            types.append(eid)
+        edge_index = torch.tensor([src, dst], dtype=torch.long).view(2, -1)
+        edge_type = torch.tensor(types, dtype=torch.long)
+        
+        # 노드 정보/라벨 (노드 순서대로)
+        node_info = [{"node_type": "scene", "node_id": ids["scene"][0], "node_label": "scene", "type_name": "scene"}]
+        for node_type in ("object", "event"):
+            for node_id, label in zip(ids[node_type], labels[node_type]):
+                node_info.append({"node_type": node_type, "node_id": node_id, "node_label": label, "type_name": node_type})
+        for spat_idx in range(counts[3]):
+            node_info.append({"node_type": "spatial", "node_id": spat_idx + 20000, "node_label": "spatial", "type_name": "spatial"})
+        node_labels = ["scene"] + labels["object"] + labels["event"] + labels["spatial"]
+        
+        return {
+            "x": x,
+            "edge_index": edge_index,
+            "edge_type": edge_type,
+            "node_type": node_type_tensor,
+            "node_info": node_info,
+            "node_labels": node_labels,
+        }
+    
+    def analyze_scene_graph(self, scene_graph_json: Union[Dict, str, Path]) -> Dict[str, np.ndarray]:
         """
         장면 그래프를 분석하여 노드 임베딩을 생성합니다.
         
@@ -351,7 +641,7 @@ class SceneGraphAnalyzer:
             scene_graph_json: 장면 그래프 JSON (딕셔너리, 파일 경로, 또는 Path 객체)
             
         Returns:
-            Dict[str, torch.Tensor]: 노드 타입별 임베딩 딕셔너리
+            Dict[str, np.ndarray]: 노드 타입별 임베딩 딕셔너리 (임베딩은 numpy 배열)
                 - "scene": 장면 임베딩
                 - "object": 객체 임베딩들
                 - "event": 이벤트 임베딩들
@@ -365,154 +655,47 @@ class SceneGraphAnalyzer:
             with open(scene_graph_json, 'r', encoding='utf-8') as f:
                 scene_graph_json = json.load(f)
         
-        # 이종 그래프로 변환
-        hetero_data = self.json_to_hetero_data(scene_graph_json)
-        if hetero_data is None:
+        # 동일한 장면 그래프는 캐시된 결과 반환 (키 정렬 직렬화 기준)
+        cache_key = None
+        if isinstance(scene_graph_json, dict):
+            digest = hashlib.blake2b(orjson.dumps(scene_graph_json, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS), digest_size=16).digest()
+            cache_key = (self.model_path, self.sbert_model_name, digest)
+            cached = self._result_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        # 동종 그래프 텐서로 바로 변환 (HeteroData.to_homogeneous 변환 생략)
+        graph = self.json_to_homogeneous(scene_graph_json)
+        if graph is None:
             raise ValueError("Invalid scene graph JSON format")
-        
-        # 동종 그래프로 변환
-        homo_data = hetero_data.to_homogeneous(
-            node_attrs=["x", "node_type"],
-            add_node_type=True,
-            add_edge_type=False
-        )
+        node_types = graph["node_type"]
         
         # RGCN을 통한 임베딩 생성
-        with torch.no_grad():
-            homo_data = homo_data.to(self.device)
+        with torch.inference_mode():
             node_embeddings = self.rgcn_model(
-                homo_data.x, 
-                homo_data.edge_index, 
-                homo_data.edge_type
+                graph["x"].to(self.device), 
+                graph["edge_index"].to(self.device), 
+                graph["edge_type"].to(self.device)
             )
-            node_embeddings = F.normalize(node_embeddings, dim=1)
+            node_embeddings = self._to_host_numpy(F.normalize(node_embeddings, dim=1))
+        node_types = node_types.numpy()
         
-        # 노드 정보 추출 (순서대로)
-        node_info = self._extract_node_info(hetero_data, homo_data.node_type)
-        
-        # 결과 구성
+        # 결과 구성 (numpy 배열 그대로 반환, 직렬화는 저장/전송 단계에서 수행)
         result = {
-            "node_embeddings": node_embeddings.cpu().tolist(),  # 리스트 형태로 변환
-            "node_info": node_info,  # 각 노드의 상세 정보
-            "node_types": homo_data.node_type.cpu().tolist(),  # 리스트 형태로 변환
-            "node_labels": self._extract_node_labels(hetero_data)
+            "node_embeddings": node_embeddings,  # [N, OUT_DIM] numpy 배열
+            "node_info": graph["node_info"],  # 각 노드의 상세 정보
+            "node_types": node_types,  # [N] numpy 배열
+            "node_labels": graph["node_labels"]
         }
         
         # 노드 타입별로 임베딩 분리 (기존 호환성 유지)
-        node_type_mapping = {0: "scene", 1: "object", 2: "event", 3: "spatial"}
-        for node_type, type_name in node_type_mapping.items():
-            mask = homo_data.node_type == node_type
-            if mask.any():
-                result[type_name] = node_embeddings[mask].cpu().tolist()  # 리스트 형태로 변환
-            else:
-                result[type_name] = []  # 빈 리스트로 초기화
-        
-        return result
-    
-    def _extract_node_info(self, hetero_data: HeteroData, node_types: torch.Tensor) -> List[Dict]:
-        """
-        각 노드의 상세 정보를 추출합니다.
-        
-        Args:
-            hetero_data (HeteroData): 이종 그래프 데이터
-            node_types (torch.Tensor): 노드 타입 정보
-            
-        Returns:
-            List[Dict]: 각 노드의 상세 정보 리스트
-        """
-        node_info = []
+        for type_id, type_name in enumerate(NODE_TYPES):
+            result[type_name] = node_embeddings[node_types == type_id]  # 해당 타입이 없으면 [0, OUT_DIM] 배열
         
-        # 노드 타입별로 정보 추출
-        node_type_mapping = {0: "scene", 1: "object", 2: "event", 3: "spatial"}
+        if cache_key is not None:
+            self._result_cache.put(cache_key, result)
         
-        # 각 타입별 인덱스 추적
-        scene_idx = 0
-        obj_idx = 0
-        evt_idx = 0
-        spat_idx = 0
-        
-        for i, node_type in enumerate(node_types.tolist()):
-            type_name = node_type_mapping[node_type]
-            
-            if node_type == 0:  # scene
-                node_id = hetero_data["scene"].node_ids[scene_idx] if hasattr(hetero_data["scene"], "node_ids") else 50000
-                node_info.append({
-                    "node_type": "scene",
-                    "node_id": node_id,
-                    "node_label": "scene",
-                    "type_name": "scene"
-                })
-                scene_idx += 1
-            elif node_type == 1:  # object
-                if hasattr(hetero_data["object"], "node_ids") and obj_idx < len(hetero_data["object"].node_ids):
-                    node_id = hetero_data["object"].node_ids[obj_idx]
-                    node_label = hetero_data["object"].label_text[obj_idx] if hasattr(hetero_data["object"], "label_text") else "unknown"
-                else:
-                    node_id = obj_idx + 1
-                    node_label = "unknown"
-                
-                node_info.append({
-                    "node_type": "object", 
-                    "node_id": node_id,
-                    "node_label": node_label,
-                    "type_name": "object"
-                })
-                obj_idx += 1
-            elif node_type == 2:  # event
-                if hasattr(hetero_data["event"], "node_ids") and evt_idx < len(hetero_data["event"].node_ids):
-                    node_id = hetero_data["event"].node_ids[evt_idx]
-                    node_label = hetero_data["event"].label_text[evt_idx] if hasattr(hetero_data["event"], "label_text") else "unknown"
-                else:
-                    node_id = evt_idx + 101
-                    node_label = "unknown"
-                
-                node_info.append({
-                    "node_type": "event",
-                    "node_id": node_id,
-                    "node_label": node_label,
-                    "type_name": "event"
-                })
-                evt_idx += 1
-            else:  # spatial
-                node_info.append({
-                    "node_type": "spatial",
-                    "node_id": spat_idx + 20000,
-                    "node_label": "spatial",
-                    "type_name": "spatial"
-                })
-                spat_idx += 1
-        
-        return node_info
-    
-    def _extract_node_labels(self, hetero_data: HeteroData) -> List[str]:
-        """
-        노드 라벨을 추출합니다.
-        
-        Args:
-            hetero_data (HeteroData): 이종 그래프 데이터
-            
-        Returns:
-            List[str]: 노드 라벨 리스트
-        """
-        labels = []
-        
-        # 장면 노드
-        if hasattr(hetero_data["scene"], "x") and hetero_data["scene"].x.size(0) > 0:
-            labels.append("scene")
-        
-        # 객체 노드
-        if hasattr(hetero_data["object"], "label_text"):
-            labels.extend(hetero_data["object"].label_text)
-        
-        # 이벤트 노드
-        if hasattr(hetero_data["event"], "label_text"):
-            labels.extend(hetero_data["event"].label_text)
-        
-        # 공간 관계 노드
-        if hasattr(hetero_data["spatial"], "label_text"):
-            labels.extend(hetero_data["spatial"].label_text)
-        
-        return labels
+        return result
     
     def get_node_info(self, scene_graph_json: Union[Dict, str, Path]) -> Dict[str, List[Dict]]:
         """
@@ -583,6 +766,30 @@ class RGCN(torch.nn.Module):
                      num_rel + 1, num_bases=num_bases)
             for i in range(hop)
         ])
+        
+        # 노드 수(32 단위 올림)별 self-loop 텐서 캐시: {(크기, device): (self_loops, loop_types)}
+        self._loop_cache: Dict[Tuple[int, torch.device], Tuple[torch.Tensor, torch.Tensor]] = {}
+    
+    def _self_loops(self, N: int, device: torch.device) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        N개 노드의 self-loop 엣지 인덱스/타입을 반환합니다. 32 단위로 올림한 크기로 한 번 만들어 두고 잘라서 재사용합니다.
+        
+        Args:
+            N (int): 노드 수
+            device (torch.device): 텐서 디바이스
+            
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: ([2, N] self-loop 엣지 인덱스, [N] self-loop 엣지 타입)
+        """
+        size = (N + 31) // 32 * 32
+        cached = self._loop_cache.get((size, device))
+        if cached is None:
+            loop_idx = torch.arange(size, device=device)
+            cached = (torch.stack([loop_idx, loop_idx]),
+                      torch.full((size,), self.self_loop_id, dtype=torch.long, device=device))
+            self._loop_cache[(size, device)] = cached
+        self_loops, loop_types = cached
+        return self_loops[:, :N], loop_types[:N]
     
     def forward(self, x: torch.Tensor, edge_index: torch.Tensor, edge_type: torch.Tensor) -> torch.Tensor:
         """
@@ -596,10 +803,7 @@ class RGCN(torch.nn.Module):
         Returns:
             torch.Tensor: 노드 임베딩
         """
-        N = x.size(0)
-        loop_idx = torch.arange(N, device=x.device)
-        self_loops = torch.stack([loop_idx, loop_idx])
-        loop_types = torch.full((N,), self.self_loop_id, dtype=torch.long, device=x.device)
+        self_loops, loop_types = self._self_loops(x.size(0), x.device)
         
         edge_index = torch.cat([edge_index, self_loops], dim=1)
         edge_type = torch.cat([edge_type, loop_types])
@@ -261,6 +261,9 @@ POLICY_DICT = {
     "short_form": SHORT_FORM_POLICY
 }
 
+# 호출마다 속성 조회를 하지 않도록 POLICY_DICT.get을 미리 바인딩
+_policy_get = POLICY_DICT.get
+
 def get_policy(policy_name: str = "default") -> str:
     """
     Get the safety policy based on the policy name.
@@ -271,4 +274,4 @@ def get_policy(policy_name: str = "default") -> str:
     Returns:
         str: The safety policy.
     """
-    return POLICY_DICT.get(policy_name, DEFAULT_POLICY)
\ No newline at end of file
+    return _policy_get(policy_name, DEFAULT_POLICY)
\ No newline at end of file
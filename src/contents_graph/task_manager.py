@@ -1,18 +1,24 @@
 import os
+import asyncio
 import redis
-import json
+import redis.asyncio
+import orjson
 import uuid
 import time
+import random
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from typing import Dict, Optional
+from typing import List, Optional
 import logger_init
-from .celery_app import celery_app
+from .celery_app import celery_app, task_event_channel, publish_task_event
+from .task_status import TaskStatus, TaskStatusCode, TaskState, FINISHED_STATUSES
 from .tasks import process_meta2graph, process_retrieval_graph
 
 # logger 초기화
 try:
     logger = logger_init.get_logger()
-    if logger is None:
+    if logger is None or not logger.hasHandlers():
         # fallback logger
         import logging
         logger = logging.getLogger(__name__)
@@ -23,160 +29,355 @@ except:
     logger = logging.getLogger(__name__)
     logging.basicConfig(level=logging.INFO)
 
-class TaskStatus(str, Enum):
-    PENDING = "PENDING"
-    PROGRESS = "PROGRESS"
-    SUCCESS = "SUCCESS"
-    FAILURE = "FAILURE"
-    REVOKED = "REVOKED"
+# 태스크 정보 TTL (초) 및 만료 시점 분산을 위한 jitter 비율
+TASK_TTL = 3600
+TASK_TTL_JITTER = 0.1
 
-class TaskStatusCode(int, Enum):
-    PENDING = 200
-    PROGRESS = 201
-    SUCCESS = 202
-    FAILURE = 203
-    REVOKED = 204
+# 상태 변화 없이 진행률만 이 값(%p) 미만으로 바뀌면 Redis에 다시 쓰지 않음
+PROGRESS_WRITE_THRESHOLD = 1.0
+
+# Redis 해시에 JSON으로 저장하는 필드 (나머지는 문자열 스칼라)
+JSON_FIELDS = ("data", "result")
+
+# Redis 연결 풀 크기 (API 핸들러/제출 스레드가 연결을 새로 맺지 않고 재사용)
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 20))
+
+# 상태 변경 알림을 놓친 경우를 대비해 알림 없이도 상태를 다시 확인하는 간격 (초)
+WATCH_RECHECK_INTERVAL = 5.0
 
 class TaskManager:
     def __init__(self):
-        self.redis_client = redis.Redis.from_url(
+        # 프로세스 내 모든 요청이 공유하는 연결 풀 (풀이 가득 차면 새 연결 대신 반납을 기다림)
+        self.redis_pool = redis.BlockingConnectionPool.from_url(
             os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            max_connections=REDIS_MAX_CONNECTIONS,
+            timeout=5,
+            socket_keepalive=True,
             decode_responses=True
         )
+        self.redis_client = redis.Redis(connection_pool=self.redis_pool)
+        # 상태 변경 알림 구독용 비동기 클라이언트 (이벤트 루프 안에서 처음 사용할 때 생성)
+        self._async_redis = None
         self.task_prefix = "media_graph_task:"
+        
+        # Celery 전송(apply_async)을 백그라운드에서 처리하는 스레드 풀
+        self._submit_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="task-submit")
+    
+    @staticmethod
+    def _encode_fields(fields: dict) -> dict:
+        """Redis 해시에 저장할 값으로 변환 (data/result는 JSON, 나머지 스칼라는 문자열, None은 저장하지 않음)"""
+        encoded = {}
+        for name, value in fields.items():
+            if value is None:
+                continue
+            if name in JSON_FIELDS:
+                encoded[name] = orjson.dumps(value)
+            else:
+                encoded[name] = value.value if isinstance(value, Enum) else value
+        return encoded
+    
+    @staticmethod
+    def _decode_task(fields: dict) -> TaskState:
+        """Redis 해시(HGETALL 결과)를 TaskState로 변환"""
+        return TaskState(
+            task_id=fields["task_id"],
+            status=fields["status"],
+            status_code=int(fields["status_code"]),
+            progress=float(fields.get("progress", 0.0)),
+            result=orjson.loads(fields["result"]) if "result" in fields else None,
+            data=orjson.loads(fields["data"]) if "data" in fields else None,
+            created_at=float(fields["created_at"]) if "created_at" in fields else None,
+            celery_task_id=fields.get("celery_task_id")
+        )
+    
+    def _task_ttl(self) -> int:
+        """동시에 생성된 태스크들이 한꺼번에 만료되지 않도록 TTL에 jitter 추가"""
+        return TASK_TTL + int(random.uniform(0, TASK_TTL * TASK_TTL_JITTER))
+    
+    def _save_fields(self, task_id: str, fields: dict, pipe=None):
+        """
+        태스크 해시의 주어진 필드만 HSET하고 TTL을 갱신 (HSET + EXPIRE를 파이프라인으로 한 번에 전송)
+        pipe가 주어지면 해당 파이프라인에 명령만 추가하고 실행은 호출 측에서 합니다.
+        """
+        key = f"{self.task_prefix}{task_id}"
+        own_pipe = pipe is None
+        if own_pipe:
+            pipe = self.redis_client.pipeline(transaction=True)
+        pipe.hset(key, mapping=self._encode_fields(fields))
+        pipe.expire(key, self._task_ttl())
+        if own_pipe:
+            pipe.execute()
+    
+    def _save_task(self, task: TaskState):
+        """태스크 정보 전체를 Redis 해시로 저장 (TASK_TTL + jitter)"""
+        self._save_fields(task.task_id, task.to_dict())
     
-    def create_task(self, data: dict, task_name: str) -> str:
-        """새로운 태스크를 생성하고 Celery에 제출"""
-        task_id = f"{task_name}_{str(uuid.uuid4())}"
+    def _new_task(self, data: dict, task_name: str) -> TaskState:
+        """새로운 태스크 정보를 생성 (Redis I/O 없음)"""
+        return TaskState(
+            task_id=f"{task_name}_{str(uuid.uuid4())}",
+            status=TaskStatus.PENDING,
+            status_code=TaskStatusCode.PENDING,
+            progress=0.0,
+            data=data,
+            created_at=time.time()
+        )
+    
+    def create_task(self, data: dict, task_name: str) -> TaskState:
+        """새로운 태스크를 생성하고 Redis에 저장한 태스크 정보를 반환"""
+        task = self._new_task(data, task_name)
         
         # Redis에 태스크 정보 저장
-        task_info = {
-            "task_id": task_id,
-            "status": TaskStatus.PENDING,
-            "status_code": TaskStatusCode.PENDING,
-            "data": data,
-            "result": None,
-            "progress": 0.0,
-            "created_at": time.time(),
-            "celery_task_id": None
-        }
-        
-        self.redis_client.setex(
-            f"{self.task_prefix}{task_id}",
-            3600,  # 1시간 TTL
-            json.dumps(task_info)
-        )
+        self._save_task(task)
         
-        logger.info(f"Created task: {task_id}")
-        return task_id
+        logger.info(f"Created task: {task.task_id}")
+        return task
     
-    def get_task(self, task_id: str) -> Optional[dict]:
+    def get_task(self, task_id: str) -> Optional[TaskState]:
         """태스크 정보를 Redis에서 가져오기"""
-        task_data = self.redis_client.get(f"{self.task_prefix}{task_id}")
+        task_data = self.redis_client.hgetall(f"{self.task_prefix}{task_id}")
         if not task_data:
             return None
         
-        task_info = json.loads(task_data)
+        task = self._decode_task(task_data)
         
         # Celery 태스크가 있다면 상태 업데이트
-        if task_info.get("celery_task_id"):
-            self._update_task_from_celery(task_info)
+        if task.celery_task_id:
+            self._update_task_from_celery(task)
         
-        return task_info
+        return task
     
-    def _update_task_from_celery(self, task_info: dict):
+    def get_tasks(self, task_ids: List[str]) -> List[Optional[TaskState]]:
+        """여러 태스크 정보를 파이프라인 HGETALL 한 번으로 가져오기 (없는 태스크는 None)"""
+        if not task_ids:
+            return []
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        for task_id in task_ids:
+            pipe.hgetall(f"{self.task_prefix}{task_id}")
+        tasks, tracked = [], []
+        for task_id, task_data in zip(task_ids, pipe.execute()):
+            if not task_data:
+                tasks.append(None)
+                continue
+            task = self._decode_task(task_data)
+            tasks.append(task)
+            if task.celery_task_id:
+                tracked.append(task)
+        
+        # Celery 상태를 한 번에 조회해 반영하고, 바뀐 필드는 파이프라인 하나로 저장
+        if tracked:
+            states = self._get_celery_states([task.celery_task_id for task in tracked])
+            write_pipe = self.redis_client.pipeline(transaction=False)
+            for task, (state, info) in zip(tracked, states):
+                self._apply_celery_state(task, state, info, pipe=write_pipe)
+            write_pipe.execute()
+        
+        return tasks
+    
+    def _get_celery_states(self, celery_task_ids: List[str]) -> List[tuple]:
+        """
+        여러 Celery 태스크의 (state, info)를 조회합니다.
+        Redis 결과 백엔드면 celery-task-meta 키를 파이프라인 GET 한 번으로 읽고, 그 외 백엔드는 AsyncResult로 하나씩 조회합니다.
+        """
+        backend = celery_app.backend
+        client = getattr(backend, "client", None)
+        if client is None or not hasattr(backend, "get_key_for_task"):
+            states = []
+            for celery_task_id in celery_task_ids:
+                celery_result = celery_app.AsyncResult(celery_task_id)
+                states.append((celery_result.state, celery_result.info))
+            return states
+        
+        pipe = client.pipeline(transaction=False)
+        for celery_task_id in celery_task_ids:
+            pipe.get(backend.get_key_for_task(celery_task_id))
+        states = []
+        for payload in pipe.execute():
+            if payload is None:
+                # 결과가 아직 없으면 AsyncResult와 동일하게 PENDING
+                states.append(("PENDING", None))
+                continue
+            meta = backend.decode_result(payload)
+            states.append((meta.get("status", "PENDING"), meta.get("result")))
+        return states
+    
+    def _update_task_from_celery(self, task: TaskState):
         """Celery 태스크 상태를 확인하고 업데이트"""
-        celery_task_id = task_info["celery_task_id"]
-        celery_result = celery_app.AsyncResult(celery_task_id)
-        
-        if celery_result.state == 'PENDING':
-            task_info["status"] = TaskStatus.PENDING
-            task_info["status_code"] = TaskStatusCode.PENDING
-        elif celery_result.state == 'PROGRESS':
-            task_info["status"] = TaskStatus.PROGRESS
-            task_info["status_code"] = TaskStatusCode.PROGRESS
-            if celery_result.info:
-                task_info["progress"] = celery_result.info.get("progress", 0.0)
-        elif celery_result.state == 'SUCCESS':
-            task_info["status"] = TaskStatus.SUCCESS
-            task_info["status_code"] = TaskStatusCode.SUCCESS
-            task_info["result"] = celery_result.result
-            task_info["progress"] = 100.0
-        elif celery_result.state == 'FAILURE':
-            task_info["status"] = TaskStatus.FAILURE
-            task_info["status_code"] = TaskStatusCode.FAILURE
-            task_info["result"] = {"error": str(celery_result.info)}
-        elif celery_result.state == 'REVOKED':
-            task_info["status"] = TaskStatus.REVOKED
-            task_info["status_code"] = TaskStatusCode.REVOKED
-        
-        # Redis에 업데이트된 정보 저장
-        self.redis_client.setex(
-            f"{self.task_prefix}{task_info['task_id']}",
-            3600,
-            json.dumps(task_info)
-        )
+        celery_result = celery_app.AsyncResult(task.celery_task_id)
+        self._apply_celery_state(task, celery_result.state, celery_result.info)
     
-    def submit_meta2graph_task(self, metadata: dict, video_info: dict, meta2graph_config: dict, graph_anlayzer_config: dict, db_config: dict) -> str:
-        """Meta2Graph 태스크를 Celery에 제출"""
-        task_id = self.create_task({"metadata": metadata}, "meta2graph")
+    def _apply_celery_state(self, task: TaskState, state: str, info, pipe=None):
+        """Celery 상태(state)와 info(PROGRESS 메타/결과/예외)를 태스크 정보에 반영하고 바뀐 필드만 저장"""
+        before = (task.status, task.status_code, task.progress, task.result)
         
-        # Celery 태스크 제출
-        celery_task = process_meta2graph.delay(metadata, video_info, meta2graph_config, graph_anlayzer_config, db_config)
+        if state == 'PENDING':
+            task.status = TaskStatus.PENDING
+            task.status_code = TaskStatusCode.PENDING
+        elif state == 'PROGRESS':
+            task.status = TaskStatus.PROGRESS
+            task.status_code = TaskStatusCode.PROGRESS
+            if info:
+                task.progress = info.get("progress", 0.0)
+        elif state == 'SUCCESS':
+            task.status = TaskStatus.SUCCESS
+            task.status_code = TaskStatusCode.SUCCESS
+            task.result = info
+            task.progress = 100.0
+        elif state == 'FAILURE':
+            task.status = TaskStatus.FAILURE
+            task.status_code = TaskStatusCode.FAILURE
+            task.result = {"error": str(info)}
+        elif state == 'REVOKED':
+            task.status = TaskStatus.REVOKED
+            task.status_code = TaskStatusCode.REVOKED
         
-        # Redis에 Celery 태스크 ID 저장
-        task_info = self.get_task(task_id)
-        task_info["celery_task_id"] = celery_task.id
-        self.redis_client.setex(
-            f"{self.task_prefix}{task_id}",
-            3600,
-            json.dumps(task_info)
-        )
+        # 바뀐 필드만 Redis 해시에 저장 (data 등 큰 필드는 다시 쓰지 않음)
+        after = (task.status, task.status_code, task.progress, task.result)
+        changed = {
+            name: new for name, old, new in zip(("status", "status_code", "progress", "result"), before, after)
+            if old != new
+        }
+        # 상태는 그대로이고 진행률만 조금 바뀐 경우는 저장 생략 (반환하는 태스크 정보에는 최신 진행률 반영)
+        if changed.keys() == {"progress"} and abs(after[2] - before[2]) < PROGRESS_WRITE_THRESHOLD:
+            return
+        if changed:
+            self._save_fields(task.task_id, changed, pipe=pipe)
+    
+    def _get_async_redis(self) -> redis.asyncio.Redis:
+        if self._async_redis is None:
+            self._async_redis = redis.asyncio.Redis.from_url(
+                os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                decode_responses=True
+            )
+        return self._async_redis
+    
+    async def watch_task(self, task_id: str, recheck_interval: float = WATCH_RECHECK_INTERVAL, timeout: float = 600.0):
+        """
+        태스크 상태 변경 알림(Redis pub/sub)을 구독하다가 상태/진행률이 바뀔 때마다 태스크 정보를 yield합니다.
+        워커가 상태를 바꿀 때만 상태를 다시 읽고, 알림을 놓친 경우에 대비해 recheck_interval마다 한 번 더 확인합니다.
+        종료 상태(SUCCESS/FAILURE/REVOKED)에 도달하거나 태스크가 사라지면 종료됩니다.
+        태스크가 없으면 아무것도 yield하지 않고 종료되므로, 첫 항목 유무로 존재 여부를 판단할 수 있습니다.
+        
+        Args:
+            task_id (str): 태스크 ID
+            recheck_interval (float): 알림이 없을 때 상태를 다시 확인하는 간격 (초)
+            timeout (float): 최대 감시 시간 (초)
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        task = await asyncio.to_thread(self.get_task, task_id)
+        if task is None:
+            return
+        yield task
+        if task.status in FINISHED_STATUSES or not task.celery_task_id:
+            return
+        last_state = (task.status, task.progress)
         
-        logger.info(f"Submitted meta2graph task {task_id} to Celery: {celery_task.id}")
-        return task_id
+        pubsub = self._get_async_redis().pubsub()
+        await pubsub.subscribe(task_event_channel(task.celery_task_id))
+        try:
+            # 구독 직후 한 번, 이후에는 알림을 받거나 recheck_interval이 지날 때마다 상태를 다시 읽음
+            # (첫 확인으로 구독 전에 바뀐 상태도 놓치지 않음)
+            while True:
+                task = await asyncio.to_thread(self.get_task, task_id)
+                if task is None:
+                    return
+                state = (task.status, task.progress)
+                if state != last_state:
+                    last_state = state
+                    yield task
+                if task.status in FINISHED_STATUSES:
+                    return
+                
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(recheck_interval, remaining))
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
     
-    def submit_retrieval_graph_task(self, query: str, tau: float, top_k: int, config: dict) -> str:
-        """RetrievalGraph 태스크를 Celery에 제출"""
-        task_id = self.create_task({
+    async def wait_for_change(self, task_id: str, last_status: Optional[int] = None) -> Optional[TaskState]:
+        """
+        태스크 상태 코드가 last_status와 달라지거나 종료 상태가 될 때까지 대기한 뒤 태스크 정보를 반환합니다. (long-polling)
+        watch_task의 상태 변경 알림(pub/sub)으로 깨어나므로 대기 중에는 상태를 반복 조회하지 않습니다.
+        호출 측에서 asyncio.wait_for로 대기 시간을 제한합니다.
+        """
+        task = None
+        # 조건을 만족해 중간에 빠져나오면 구독도 바로 해제
+        async with aclosing(self.watch_task(task_id)) as updates:
+            async for task in updates:
+                if task.status_code != last_status or task.status in FINISHED_STATUSES:
+                    break
+        return task
+    
+    def _submit(self, task: TaskState, celery_task, *args) -> TaskState:
+        """
+        Celery 태스크 ID를 미리 정해 태스크 정보를 Redis에 기록(HSET + EXPIRE 파이프라인, 1 RTT)한 뒤,
+        Celery 전송만 백그라운드에서 처리하고 바로 반환합니다.
+        반환 시점에 이미 Redis에 기록되어 있으므로 어느 API 워커 프로세스로 조회해도 태스크가 보입니다.
+        
+        Args:
+            task (TaskState): _new_task로 만든 태스크 정보
+            celery_task: 제출할 Celery 태스크 (process_meta2graph 등)
+            *args: Celery 태스크 인자
+        """
+        task.celery_task_id = str(uuid.uuid4())
+        # 워커가 상태를 갱신하기 전에 기록이 먼저 존재하도록 Redis 저장 후 전송
+        self._save_task(task)
+        self._submit_executor.submit(self._dispatch, task, celery_task, args)
+        return task
+    
+    def _dispatch(self, task: TaskState, celery_task, args: tuple):
+        """Celery에 태스크 전송 (백그라운드 스레드에서 실행, 실패하면 태스크를 FAILURE로 기록)"""
+        try:
+            celery_task.apply_async(args=args, task_id=task.celery_task_id)
+            logger.info(f"Submitted {task.task_id} to Celery: {task.celery_task_id}")
+        except Exception as e:
+            logger.error(f"Failed to submit task {task.task_id}: {e}")
+            try:
+                self._save_fields(task.task_id, {
+                    "status": TaskStatus.FAILURE,
+                    "status_code": TaskStatusCode.FAILURE,
+                    "result": {"error": str(e)}
+                })
+            except Exception as save_error:
+                logger.error(f"Failed to record submit failure for {task.task_id}: {save_error}")
+    
+    def submit_meta2graph_task(self, metadata: dict, video_info: dict, meta2graph_config: dict, graph_anlayzer_config: dict, db_config: dict) -> TaskState:
+        """Meta2Graph 태스크를 Redis에 기록하고 Celery에 제출 (전송은 백그라운드에서 처리)"""
+        task = self._new_task({"metadata": metadata}, "meta2graph")
+        return self._submit(task, process_meta2graph, metadata, video_info, meta2graph_config, graph_anlayzer_config, db_config)
+    
+    def submit_retrieval_graph_task(self, query: str, tau: float, top_k: int, config: dict) -> TaskState:
+        """RetrievalGraph 태스크를 Redis에 기록하고 Celery에 제출 (전송은 백그라운드에서 처리)"""
+        task = self._new_task({
             "query": query,
             "tau": tau,
             "top_k": top_k
         }, "retrieval_graph")
-        
-        # Celery 태스크 제출
-        celery_task = process_retrieval_graph.delay(query, tau, top_k, config)
-        
-        # Redis에 Celery 태스크 ID 저장
-        task_info = self.get_task(task_id)
-        task_info["celery_task_id"] = celery_task.id
-        self.redis_client.setex(
-            f"{self.task_prefix}{task_id}",
-            3600,
-            json.dumps(task_info)
-        )
-        
-        logger.info(f"Submitted retrieval_graph task {task_id} to Celery: {celery_task.id}")
-        return task_id
+        return self._submit(task, process_retrieval_graph, query, tau, top_k, config)
     
     def cancel_task(self, task_id: str) -> bool:
         """태스크 취소"""
-        task_info = self.get_task(task_id)
-        if not task_info:
+        task = self.get_task(task_id)
+        if not task:
             return False
         
-        if task_info.get("celery_task_id"):
+        if task.celery_task_id:
             # Celery 태스크 취소
-            celery_app.control.revoke(task_info["celery_task_id"], terminate=True)
+            celery_app.control.revoke(task.celery_task_id, terminate=True)
         
         # Redis에서 태스크 상태 업데이트
-        task_info["status"] = TaskStatus.REVOKED
-        task_info["status_code"] = TaskStatusCode.REVOKED
-        self.redis_client.setex(
-            f"{self.task_prefix}{task_id}",
-            3600,
-            json.dumps(task_info)
-        )
+        task.status = TaskStatus.REVOKED
+        task.status_code = TaskStatusCode.REVOKED
+        self._save_fields(task_id, {"status": task.status, "status_code": task.status_code})
+        
+        if task.celery_task_id:
+            # 상태를 감시 중인 SSE/WebSocket/long-polling 요청에 취소 알림
+            publish_task_event(task.celery_task_id, TaskStatus.REVOKED.value)
         
         logger.info(f"Cancelled task: {task_id}")
         return True
@@ -0,0 +1,42 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Optional
+
+
+class TaskStatus(str, Enum):
+    PENDING = "PENDING"
+    PROGRESS = "PROGRESS"
+    SUCCESS = "SUCCESS"
+    FAILURE = "FAILURE"
+    REVOKED = "REVOKED"
+
+class TaskStatusCode(int, Enum):
+    PENDING = 200
+    PROGRESS = 201
+    SUCCESS = 202
+    FAILURE = 203
+    REVOKED = 204
+
+# 더 이상 상태가 바뀌지 않는 종료 상태
+FINISHED_STATUSES = (TaskStatus.SUCCESS, TaskStatus.FAILURE, TaskStatus.REVOKED)
+FINISHED_STATUS_CODES = (TaskStatusCode.SUCCESS, TaskStatusCode.FAILURE, TaskStatusCode.REVOKED)
+
+
+@dataclass(slots=True)
+class TaskState:
+    """Redis에 저장되는 태스크 정보 (TaskManager.get_task 반환값)"""
+    task_id: str
+    status: str
+    status_code: int
+    progress: float = 0.0
+    result: Any = None
+    data: Any = None
+    created_at: Optional[float] = None
+    celery_task_id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, task_info: dict) -> "TaskState":
+        return cls(**task_info)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -1,7 +1,9 @@
 import os
 import sys
 import time
+import functools
 from celery import current_task
+from celery.signals import task_postrun
 from dotenv import load_dotenv
 
 # Python 경로에 src 디렉토리 추가
@@ -10,7 +12,7 @@ sys.path.insert(0, '/workspace')
 
 load_dotenv()
 
-from .celery_app import celery_app
+from .celery_app import celery_app, publish_task_event
 from .core.meta_to_graph_converter import MetaToGraphConverter
 from .core.retrieval_graph_converter import RetrievalGraphConverter
 from .core.scene_graph_analyzer import SceneGraphAnalyzer
@@ -20,7 +22,7 @@ from src.db.scene_graph_client import SceneGraphDBClient
 try:
     import logger_init
     logger = logger_init.get_logger()
-    if logger is None:
+    if logger is None or not logger.hasHandlers():
         # fallback logger
         import logging
         logger = logging.getLogger(__name__)
@@ -31,7 +33,54 @@ except:
     logger = logging.getLogger(__name__)
     logging.basicConfig(level=logging.INFO)
 
-@celery_app.task(bind=True, name='src.contents_graph.tasks.process_meta2graph')
+class EventTask(celery_app.Task):
+    """update_state로 상태/진행률을 바꿀 때마다 상태 변경 알림을 PUBLISH하는 태스크 기반 클래스"""
+
+    def update_state(self, task_id=None, state=None, meta=None, **kwargs):
+        super().update_state(task_id=task_id, state=state, meta=meta, **kwargs)
+        publish_task_event(task_id or self.request.id, state)
+
+@task_postrun.connect
+def _publish_final_state(sender=None, task_id=None, state=None, **kwargs):
+    """태스크 종료(결과 저장 후) 시 최종 상태(SUCCESS/FAILURE 등) 알림"""
+    if isinstance(sender, EventTask):
+        publish_task_event(task_id, state)
+
+# 워커 프로세스별 인스턴스 캐시 (모델/클라이언트 로드는 설정 조합마다 최초 1회만 수행)
+@functools.lru_cache(maxsize=4)
+def _get_meta2graph_converter(instruction_path, api_key, model, assistant_name, cache_dir):
+    return MetaToGraphConverter(
+        instruction_path=instruction_path,
+        api_key=api_key,
+        model=model,
+        assistant_name=assistant_name,
+        cache_dir=cache_dir
+    )
+
+@functools.lru_cache(maxsize=4)
+def _get_scene_graph_analyzer(model_path, edge_map_path, sbert_model, compile_model):
+    return SceneGraphAnalyzer(
+        model_path=model_path,
+        edge_map_path=edge_map_path,
+        sbert_model=sbert_model,
+        compile_model=compile_model
+    )
+
+@functools.lru_cache(maxsize=4)
+def _get_scene_graph_db_client(db_api_base_url):
+    return SceneGraphDBClient(db_api_base_url=db_api_base_url)
+
+@functools.lru_cache(maxsize=4)
+def _get_retrieval_graph_converter(instruction_path, api_key, model, temperature, max_tokens):
+    return RetrievalGraphConverter(
+        instruction_path=instruction_path,
+        api_key=api_key,
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+
+@celery_app.task(bind=True, base=EventTask, name='src.contents_graph.tasks.process_meta2graph')
 def process_meta2graph(self, metadata, video_info, meta2graph_config, graph_anlayzer_config, db_config):
     """
     Meta-to-SceneGraph 작업을 처리하는 Celery 태스크
@@ -58,11 +107,12 @@ def process_meta2graph(self, metadata, video_info, meta2graph_config, graph_anla
         # MetaToGraphConverter 초기화
         meta2graph_config["api_key"] = api_key
         print(f"[Celery Task] MetaToGraphConverter 초기화 시작")
-        converter = MetaToGraphConverter(
-            instruction_path=meta2graph_config["instruction_path"],
-            api_key=meta2graph_config["api_key"],
-            model=meta2graph_config["model"],
-            assistant_name=meta2graph_config["assistant_name"]
+        converter = _get_meta2graph_converter(
+            meta2graph_config["instruction_path"],
+            meta2graph_config["api_key"],
+            meta2graph_config["model"],
+            meta2graph_config["assistant_name"],
+            meta2graph_config.get("cache_dir")
         )
         print(f"[Celery Task] MetaToGraphConverter 초기화 완료")
         
@@ -77,10 +127,11 @@ def process_meta2graph(self, metadata, video_info, meta2graph_config, graph_anla
         # 진행률 업데이트
         self.update_state(state='PROGRESS', meta={'progress': 50.0, 'status': 'Processing metadata...'})
 
-        analyzer = SceneGraphAnalyzer(
-            model_path=graph_anlayzer_config["model_path"],
-            edge_map_path=graph_anlayzer_config["edge_map_path"],
-            sbert_model=graph_anlayzer_config["sbert_model"]
+        analyzer = _get_scene_graph_analyzer(
+            graph_anlayzer_config["model_path"],
+            graph_anlayzer_config["edge_map_path"],
+            graph_anlayzer_config["sbert_model"],
+            graph_anlayzer_config.get("compile_model", False)
         )
         
         embedding_result = analyzer.analyze_scene_graph(scene_graph)
@@ -88,9 +139,7 @@ def process_meta2graph(self, metadata, video_info, meta2graph_config, graph_anla
         # 진행률 업데이트
         self.update_state(state='PROGRESS', meta={'progress': 75.0, 'status': 'Finalizing...'})
         
-        scene_graph_client = SceneGraphDBClient(
-            db_api_base_url = db_config.get("db_api_base_url")
-            )
+        scene_graph_client = _get_scene_graph_db_client(db_config.get("db_api_base_url"))
         
         scene_graph_client.upload_scene_graph_with_pt(
             scene_data=scene_graph,
@@ -122,7 +171,7 @@ def process_meta2graph(self, metadata, video_info, meta2graph_config, graph_anla
         )
         raise
 
-@celery_app.task(bind=True, name='src.contents_graph.tasks.process_retrieval_graph')
+@celery_app.task(bind=True, base=EventTask, name='src.contents_graph.tasks.process_retrieval_graph')
 def process_retrieval_graph(self, query, tau, top_k, retrieval_graph_config):
     """
     Retrieval-Graph 작업을 처리하는 Celery 태스크
@@ -145,12 +194,12 @@ def process_retrieval_graph(self, query, tau, top_k, retrieval_graph_config):
         
         # RetrievalGraphConverter 초기화
         retrieval_graph_config["api_key"] = api_key
-        converter = RetrievalGraphConverter(
-            instruction_path=retrieval_graph_config["instruction_path"],
-            api_key=api_key,
-            model=retrieval_graph_config["model"],
-            temperature=retrieval_graph_config.get("temperature", 0.0),
-            max_tokens=retrieval_graph_config.get("max_tokens", 256)
+        converter = _get_retrieval_graph_converter(
+            retrieval_graph_config["instruction_path"],
+            api_key,
+            retrieval_graph_config["model"],
+            retrieval_graph_config.get("temperature", 0.0),
+            retrieval_graph_config.get("max_tokens", 256)
         )
         
         # 진행률 업데이트
@@ -1,46 +1,145 @@
 import os
-import json
+import stat
+import orjson
+import pickle
+import hashlib
+import tempfile
+import functools
 import cv2
-import time
 import numpy as np
 
+import logging
 import logger_init
-from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict
 
-# skimage import를 조건부로 처리
-try:
-    from skimage.metrics import structural_similarity as ssim
-    SKIMAGE_AVAILABLE = True
-except ImportError:
-    SKIMAGE_AVAILABLE = False
-    ssim = None
+# 모듈 logger (함수마다 get_logger()를 호출하지 않도록 import 시점에 한 번 바인딩)
+logger = logger_init.get_logger() or logging.getLogger(__name__)
+
+# 프레임 JPEG 저장을 처리하는 writer 스레드 수
+FRAME_WRITE_WORKERS = 4
+
+# SSIM 파라미터 (skimage.metrics.structural_similarity 기본값과 동일: 7x7 균일 윈도우, 표본 공분산, uint8 범위)
+SSIM_WIN_SIZE = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+SSIM_COV_NORM = SSIM_WIN_SIZE ** 2 / (SSIM_WIN_SIZE ** 2 - 1)
+
+# 키프레임 추출 시 SSIM 앞단의 밝기 히스토그램 게이트
+# (히스토그램 변화량(1 - 상관계수)이 ssim_threshold * HIST_GATE_RATIO 이하이면 변화 없음으로 보고 SSIM 생략)
+HIST_BINS = 32
+HIST_GATE_RATIO = 0.5
+
+# 파싱한 설정 파일을 pickle로 저장해 두는 사용자별 캐시 디렉토리 (워커 프로세스가 여러 개여도 JSON 파싱은 파일 버전당 한 번)
+# (공용 임시 디렉토리는 다른 사용자가 파일/심볼릭 링크를 미리 만들어 둘 수 있으므로 사용하지 않음)
+CONFIG_PICKLE_DIR = os.path.expanduser("~/.cache/media_graph")
+
+def _config_cache_dir():
+    """
+    캐시 디렉토리를 0o700으로 만들고 경로를 반환합니다.
+    현재 사용자 소유가 아니거나 다른 사용자가 쓸 수 있는 디렉토리(또는 심볼릭 링크)면 None (캐시 사용 안 함)
+    """
+    try:
+        os.makedirs(CONFIG_PICKLE_DIR, mode=0o700, exist_ok=True)
+        st = os.lstat(CONFIG_PICKLE_DIR)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o022:
+        return None
+    return CONFIG_PICKLE_DIR
+
+def _config_pickle_name(path, mtime_ns, size):
+    """설정 파일 경로/수정 시각/크기로 pickle 캐시 파일 이름 생성 (파일이 바뀌면 다른 이름이 됨)"""
+    key = hashlib.blake2b(os.path.abspath(path).encode(), digest_size=8).hexdigest()
+    return f"config.{key}.{mtime_ns}.{size}.pkl"
+
+def _load_config_pickle(cache_dir, name):
+    """pickle 캐시를 읽음 (없거나 현재 사용자가 만든 파일이 아니면 None)"""
+    try:
+        with open(os.path.join(cache_dir, name), "rb") as f:
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+
+def _save_config_pickle(cache_dir, name, config):
+    """pickle 캐시를 mkstemp로 만든 임시 파일에 쓴 뒤 rename (다른 워커가 쓰다 만 파일을 읽지 않도록)"""
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f"{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(config, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(cache_dir, name))
+    except OSError as e:
+        logger.warning(f"Failed to write config cache {name}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+@functools.lru_cache(maxsize=32)
+def _read_json_cached(path, mtime_ns, size):
+    """
+    JSON 파일을 읽어 파싱 (경로 + 수정 시각 + 크기 기준으로 캐시, 파일이 바뀌면 다시 읽음)
+    프로세스 내에서는 lru_cache, 프로세스 간에는 pickle 파일을 공유해 JSON 파싱을 생략합니다.
+    """
+    cache_dir = _config_cache_dir()
+    name = _config_pickle_name(path, mtime_ns, size)
+    config = _load_config_pickle(cache_dir, name) if cache_dir else None
+    if config is None:
+        with open(path, "rb") as f:
+            config = orjson.loads(f.read())
+        if cache_dir:
+            _save_config_pickle(cache_dir, name, config)
+    print(f"Configuration loaded successfully from {path}")
+    return config
 
 # Reading json config file
 def read_config(config_file):
-    logger = logger_init.get_logger()
     try:
-        with open(config_file) as f:
-            server_config = json.load(f)
+        st = os.stat(config_file)
+        server_config = _read_json_cached(config_file, st.st_mtime_ns, st.st_size)
     except IOError:
         logger.error("Error reading the configuration file.")
         exit(1)
 
     return server_config
 
-def get_files(directory, extensions=None):
+def iter_files(directory, extensions=None):
+    """
+    디렉토리를 재귀적으로 탐색하며 확장자가 일치하는 파일 경로를 하나씩 반환합니다.
+    os.scandir의 DirEntry를 사용해 디렉토리 여부 확인에 추가 stat 호출이 없습니다.
 
-    dest_files = []
-    for root, _, files in os.walk(directory): 
-        for file in files:
-            if any(file.lower().endswith(ext) for ext in extensions):
-                dest_files.append(os.path.join(root, file))
-    
-    return dest_files
+    Args:
+        directory (str): 탐색할 디렉토리
+        extensions (List[str]): 찾을 확장자 리스트 (예: [".mp4", ".json"])
+
+    Yields:
+        str: 파일 경로
+    """
+    # str.endswith는 튜플을 받으므로 소문자 확장자 튜플을 한 번만 만들어 둠
+    exts = tuple(ext.lower() for ext in extensions)
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        subdirs = []
+        with os.scandir(current) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_dir():
+                    # 디렉토리를 가리키는 심볼릭 링크는 os.walk와 같이 건너뜀
+                    continue
+                elif entry.name.lower().endswith(exts):
+                    yield entry.path
+        # 하위 디렉토리를 발견 순서대로 방문
+        stack.extend(reversed(subdirs))
+
+def get_files(directory, extensions=None):
+    return list(iter_files(directory, extensions))
 
 def get_video_info(video_path: str):
     # VideoCapture 객체 생성
-    logger = logger_init.get_logger()
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         logger.info("동영상을 열 수 없습니다: {}".format(video_path))
@@ -68,21 +167,39 @@ def get_video_info(video_path: str):
                 }
     
 def frame_to_time_string(frame_number, fps):
-    # 초 단위로 변환
-    total_seconds = frame_number / fps
-    
-    # 시간, 분, 초, 밀리초 계산
-    hours = int(total_seconds // 3600)
-    minutes = int((total_seconds % 3600) // 60)
-    seconds = int(total_seconds % 60)
-    milliseconds = int((total_seconds - int(total_seconds)) * 10)  # 1초를 10단위로 분할
-    
-    # 형식에 맞게 문자열 생성
-    time_string = f"{hours:02}:{minutes:02}:{seconds:02}.{milliseconds}"
-    
-    return time_string
+    # 밀리초 단위 정수로 한 번만 변환한 뒤 정수 divmod로 시간/분/초/밀리초 계산
+    total_ms = int(round(frame_number * 1000 / fps))
+    hours, rem = divmod(total_ms, 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    seconds, ms = divmod(rem, 1000)
+
+    # 형식에 맞게 문자열 생성 (소수점 아래는 1초를 10단위로 분할)
+    return f"{hours:02}:{minutes:02}:{seconds:02}.{ms // 100}"
 
-def sample_video_frames(video_path, start_frame, end_frame, fps, output_dir):
+def open_video_capture(video_path, hw_decode=False):
+    """
+    cv2.VideoCapture를 엽니다. hw_decode=True면 FFmpeg 백엔드의 하드웨어 디코딩(VAAPI/NVDEC 등)을 요청하고,
+    실패하면 소프트웨어 디코딩으로 다시 엽니다.
+
+    Args:
+        video_path (str): 비디오 파일 경로
+        hw_decode (bool): 하드웨어 가속 디코딩 사용 여부
+
+    Returns:
+        cv2.VideoCapture: 비디오 캡처 객체
+    """
+    if hw_decode and hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+        cap = cv2.VideoCapture(video_path, cv2.CAP_FFMPEG, [
+            cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY,
+            cv2.CAP_PROP_HW_DEVICE, 0,
+        ])
+        if cap.isOpened():
+            return cap
+        cap.release()
+        logger.warning(f"하드웨어 디코딩으로 열 수 없어 소프트웨어 디코딩을 사용합니다: {video_path}")
+    return cv2.VideoCapture(video_path)
+
+def sample_video_frames(video_path, start_frame, end_frame, fps, output_dir, hw_decode=False):
     """
     주어진 비디오 구간에서 지정한 FPS로 프레임을 샘플링하여 이미지로 저장합니다.
 
@@ -92,11 +209,12 @@ def sample_video_frames(video_path, start_frame, end_frame, fps, output_dir):
         end_frame (int): 끝 프레임 번호
         fps (float): 초당 추출할 프레임 수
         output_dir (str): 저장할 디렉토리 경로
+        hw_decode (bool): 하드웨어 가속 디코딩 사용 여부
 
     Returns:
         List[str]: 저장된 이미지 경로 리스트
     """
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video_capture(video_path, hw_decode)
     if not cap.isOpened():
         raise ValueError(f"Cannot open video: {video_path}")
 
@@ -113,76 +231,98 @@ def sample_video_frames(video_path, start_frame, end_frame, fps, output_dir):
     frame_index = start_frame
 
     cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-    time.sleep(0.001)  # 비디오 파일이 열릴 때까지 대기
 
-    while frame_index <= end_frame:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    # JPEG 인코딩/저장은 별도 스레드에서 처리해 디코딩과 겹치게 함
+    with ThreadPoolExecutor(max_workers=FRAME_WRITE_WORKERS) as writer:
+        writes = []
+        while frame_index <= end_frame:
+            # 건너뛸 프레임은 grab()만 하고, 저장할 프레임만 retrieve()로 디코딩
+            if not cap.grab():
+                break
 
-        if (frame_index - start_frame) % interval == 0:
-            filename = f"frame_{frame_index:06d}.jpg"
-            filepath = os.path.join(output_dir, filename)
-            cv2.imwrite(filepath, frame)
-            sampled_images.append((frame_index, filepath))
+            if (frame_index - start_frame) % interval == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                filename = f"frame_{frame_index:06d}.jpg"
+                filepath = os.path.join(output_dir, filename)
+                writes.append(writer.submit(cv2.imwrite, filepath, frame.copy()))
+                sampled_images.append((frame_index, filepath))
 
-        frame_index += 1
+            frame_index += 1
 
-    cap.release()
+        cap.release()
+        for future in writes:
+            future.result()
     return sampled_images
 
 def summarize_shot_assessment(json_list: List[Dict]) -> Dict:
     if not json_list:
         return None  # 비어있는 경우 처리
 
-    unsafe_list = [(i, j) for i, j in enumerate(json_list) if j["rating"] == "Unsafe"]
-    safe_list = [(i, j) for i, j in enumerate(json_list) if j["rating"] == "Safe"]
+    # 한 번의 순회로 Unsafe/Safe(NA 제외) 카테고리별 개수와 첫 항목을 모음 (dict는 삽입 순서 유지)
+    unsafe_count = 0
+    first_unsafe = None
+    unsafe_votes = {}
+    unsafe_first_by_cat = {}
+    first_safe = None
+    safe_votes = {}
+    safe_first_by_cat = {}
+
+    for j in json_list:
+        rating = j["rating"]
+        if rating == "Unsafe":
+            unsafe_count += 1
+            if first_unsafe is None:
+                first_unsafe = j
+            category = j["category"]
+            unsafe_votes[category] = unsafe_votes.get(category, 0) + 1
+            unsafe_first_by_cat.setdefault(category, j)
+        elif rating == "Safe":
+            if first_safe is None:
+                first_safe = j
+            category = j["category"]
+            if category != "NA: None applying":
+                safe_votes[category] = safe_votes.get(category, 0) + 1
+                safe_first_by_cat.setdefault(category, j)
 
     # 1. Unsafe가 1개만 있는 경우
-    if len(unsafe_list) == 1:
-        idx, result = unsafe_list[0]
+    if unsafe_count == 1:
         return {
-            "result": result
+            "result": first_unsafe
         }
 
-    # 2. Unsafe가 여러 개 있는 경우 → category voting + 첫 번째 기준
-    if len(unsafe_list) > 1:
-        category_votes = Counter(j["category"] for _, j in unsafe_list)
-        top_category, count = category_votes.most_common(1)[0]
-        # 동률이면 순서대로 첫 번째 매칭되는 것 사용
-        for idx, item in unsafe_list:
-            if item["category"] == top_category:
-                return {
-                    "result": {
-                        "frame_number": item["frame_number"],
-                        "rating": "Unsafe",
-                        "category": top_category,
-                        "rationale": item["rationale"]
-                    }
-                }
-
-    # Unsafe 없음 = 모두 Safe
-    safe_non_na = [(i, j) for i, j in safe_list if j["category"] != "NA: None applying"]
+    # 2. Unsafe가 여러 개 있는 경우 → category voting + 첫 번째 기준 (동률이면 먼저 나온 카테고리)
+    if unsafe_count > 1:
+        top_category = max(unsafe_votes, key=unsafe_votes.get)
+        item = unsafe_first_by_cat[top_category]
+        return {
+            "result": {
+                "frame_number": item["frame_number"],
+                "rating": "Unsafe",
+                "category": top_category,
+                "rationale": item["rationale"]
+            }
+        }
 
     # 3. Safe만 있고 NA 제외하고 category voting
-    if safe_non_na:
-        category_votes = Counter(j["category"] for _, j in safe_non_na)
-        top_category, count = category_votes.most_common(1)[0]
-        for idx, item in safe_non_na:
-            if item["category"] == top_category:
-                return {
-                    "result": {
-                        "frame_number": item["frame_number"],
-                        "rating": "Safe",
-                        "category": top_category,
-                        "rationale": item["rationale"]
-                    }
-                }
+    if safe_votes:
+        top_category = max(safe_votes, key=safe_votes.get)
+        item = safe_first_by_cat[top_category]
+        return {
+            "result": {
+                "frame_number": item["frame_number"],
+                "rating": "Safe",
+                "category": top_category,
+                "rationale": item["rationale"]
+            }
+        }
 
     # 4. 모두 Safe이고, 모두 NA인 경우 → 첫 NA 사용
-    idx, result = safe_list[0]
+    if first_safe is None:
+        raise IndexError("Safe/Unsafe 판정 항목이 없습니다")
     return {
-        "result": result
+        "result": first_safe
     }   
 
 
@@ -192,63 +332,134 @@ def load_config(config_path: str) -> dict:
     :param config_path: Path to the JSON configuration file.
     :return: Configuration as a dictionary.
     """
-    if not os.path.exists(config_path):
+    try:
+        st = os.stat(config_path)
+    except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
+    # 파일이 바뀌지 않았으면 이전에 파싱한 설정(dict)을 그대로 공유 (호출 측에서 수정하지 않음)
     try:
-        with open(config_path, "r", encoding="utf-8") as config_file:
-            config = json.load(config_file)
-            print(f"Configuration loaded successfully from {config_path}")
-            return config
-    except json.JSONDecodeError as e:
+        return _read_json_cached(config_path, st.st_mtime_ns, st.st_size)
+    except orjson.JSONDecodeError as e:
         raise ValueError(f"Error decoding JSON from {config_path}: {e}")
     
 
+def _ssim_stats(gray):
+    """
+    SSIM 계산에 필요한 프레임별 통계(float 영상, 지역 평균, 제곱의 지역 평균)를 계산합니다.
+    연속 프레임 비교에서는 프레임마다 한 번만 계산해 이전/다음 비교에 재사용합니다.
+
+    Args:
+        gray (np.ndarray): 흑백 프레임 (H, W) uint8
+
+    Returns:
+        tuple: (x, ux, uxx)
+    """
+    x = gray.astype(np.float64)
+    ksize = (SSIM_WIN_SIZE, SSIM_WIN_SIZE)
+    ux = cv2.blur(x, ksize, borderType=cv2.BORDER_REFLECT)
+    uxx = cv2.blur(x * x, ksize, borderType=cv2.BORDER_REFLECT)
+    return x, ux, uxx
+
+def _ssim_from_stats(stats1, stats2):
+    """
+    _ssim_stats로 구한 두 프레임 통계로 평균 SSIM을 계산합니다.
+    skimage의 structural_similarity 기본 설정과 같은 값을 계산하며, 필터링은 OpenCV(SIMD) 구현을 사용합니다.
+
+    Args:
+        stats1 (tuple): 첫 번째 프레임 통계
+        stats2 (tuple): 두 번째 프레임 통계
+
+    Returns:
+        float: 평균 SSIM
+    """
+    x, ux, uxx = stats1
+    y, uy, uyy = stats2
+    uxy = cv2.blur(x * y, (SSIM_WIN_SIZE, SSIM_WIN_SIZE), borderType=cv2.BORDER_REFLECT)
+
+    vx = SSIM_COV_NORM * (uxx - ux * ux)
+    vy = SSIM_COV_NORM * (uyy - uy * uy)
+    vxy = SSIM_COV_NORM * (uxy - ux * uy)
+
+    s = ((2 * ux * uy + SSIM_C1) * (2 * vxy + SSIM_C2)) / ((ux * ux + uy * uy + SSIM_C1) * (vx + vy + SSIM_C2))
+
+    # 윈도우가 영상 밖으로 나가는 테두리는 제외하고 평균 (skimage와 동일)
+    pad = (SSIM_WIN_SIZE - 1) // 2
+    return float(s[pad:-pad, pad:-pad].mean())
+
+def _gray_stats(frame):
+    """BGR 프레임을 흑백으로 변환하고 SSIM 통계를 계산"""
+    return _ssim_stats(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+
+def _gray_hist(gray):
+    """흑백 프레임의 밝기 히스토그램 (HIST_BINS 구간)"""
+    return cv2.calcHist([gray], [0], None, [HIST_BINS], [0, 256])
+
 def compute_ssim_diff(f1, f2):
-    if not SKIMAGE_AVAILABLE:
-        logger.warning("skimage not available, using basic difference instead")
-        # 기본적인 차이 계산 (간단한 픽셀 차이)
-        diff = cv2.absdiff(f1, f2)
-        return np.mean(diff) / 255.0
-    
-    f1_gray = cv2.cvtColor(f1, cv2.COLOR_BGR2GRAY)
-    f2_gray = cv2.cvtColor(f2, cv2.COLOR_BGR2GRAY)
-    score, _ = ssim(f1_gray, f2_gray, full=True)
+    score = _ssim_from_stats(_gray_stats(f1), _gray_stats(f2))
     return 1 - score  # 변화량 = 1 - 유사도
 
-def extract_keyframes_ssim(video_path, shot_ranges, output_dir,
-                           ssim_threshold=0.05, min_frame_gap=10, max_frames_per_shot=5):
-    cap = cv2.VideoCapture(video_path)
-    os.makedirs(output_dir, exist_ok=True)
+def _extract_keyframes_shots(video_path, indexed_shots, output_dir,
+                             ssim_threshold, min_frame_gap, max_frames_per_shot, hw_decode,
+                             writer, writes):
+    """
+    연속된 샷 묶음의 키프레임을 추출해 저장합니다. (VideoCapture는 스레드 간 공유할 수 없으므로 묶음마다 하나씩 사용)
+
+    Args:
+        video_path (str): 비디오 파일 경로
+        indexed_shots (List[Tuple[int, Tuple[int, int]]]): (샷 인덱스, (시작 프레임, 끝 프레임)) 리스트
+        output_dir (str): 저장할 디렉토리 경로
+        ssim_threshold, min_frame_gap, max_frames_per_shot, hw_decode: extract_keyframes_ssim과 동일
+        writer (ThreadPoolExecutor): 키프레임 저장용 executor
+        writes (List[Future]): 저장 작업 future를 모으는 리스트
 
+    Returns:
+        List[Tuple[int, str]]: (프레임 번호, 저장 경로) 리스트 (샷 순서)
+    """
+    cap = open_video_capture(video_path, hw_decode)
     sampled_images = []
 
-    for idx, (start_frame, end_frame) in enumerate(shot_ranges):
+    for idx, (start_frame, end_frame) in indexed_shots:
         cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
         last_saved_frame = None
         keyframes = []
-        prev_frame = None
+        prev_gray = None
+        prev_hist = None
+        prev_stats = None
         frame_indices = []
+        hist_gate = ssim_threshold * HIST_GATE_RATIO
 
         for f in range(start_frame, end_frame):
             ret, frame = cap.read()
             if not ret:
                 break
 
-            if prev_frame is None:
-                prev_frame = frame
+            # 흑백 변환/히스토그램은 프레임당 한 번만 계산하고 다음 프레임과의 비교에 재사용
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            hist = _gray_hist(gray)
+
+            if prev_gray is None:
+                prev_gray, prev_hist = gray, hist
                 frame_indices.append(f)
                 keyframes.append(frame)
                 last_saved_frame = f
                 continue
 
-            diff = compute_ssim_diff(prev_frame, frame)
-            if diff > ssim_threshold and (f - last_saved_frame) > min_frame_gap:
-                keyframes.append(frame)
-                frame_indices.append(f)
-                last_saved_frame = f
-
-            prev_frame = frame
+            # 최소 간격 이내이거나 히스토그램 변화가 작으면 SSIM 계산 생략
+            # (SSIM 통계는 필요할 때만 계산하고, 직전 프레임 통계는 재사용)
+            stats = None
+            if (f - last_saved_frame) > min_frame_gap and \
+                    1 - cv2.compareHist(prev_hist, hist, cv2.HISTCMP_CORREL) > hist_gate:
+                if prev_stats is None:
+                    prev_stats = _ssim_stats(prev_gray)
+                stats = _ssim_stats(gray)
+                diff = 1 - _ssim_from_stats(prev_stats, stats)
+                if diff > ssim_threshold:
+                    keyframes.append(frame)
+                    frame_indices.append(f)
+                    last_saved_frame = f
+
+            prev_gray, prev_hist, prev_stats = gray, hist, stats
 
             # 제한 수 초과 시 중단
             if len(keyframes) >= max_frames_per_shot:
@@ -262,11 +473,38 @@ def extract_keyframes_ssim(video_path, shot_ranges, output_dir,
                 keyframes = [frame]
                 frame_indices = [ (start_frame + end_frame) // 2 ]
 
-        # 저장
+        # 저장 (writer 스레드에서 인코딩/저장하고 바로 다음 샷 디코딩 진행)
         for i, (kf, frame_num) in enumerate(zip(keyframes, frame_indices)):
             out_path = os.path.join(output_dir, f'shot_{idx:04d}_f{frame_num}.jpg')
-            cv2.imwrite(out_path, kf)
+            writes.append(writer.submit(cv2.imwrite, out_path, kf))
             sampled_images.append((frame_num, out_path))
 
     cap.release()
-    return sampled_images
\ No newline at end of file
+    return sampled_images
+
+def extract_keyframes_ssim(video_path, shot_ranges, output_dir,
+                           ssim_threshold=0.05, min_frame_gap=10, max_frames_per_shot=5, hw_decode=False,
+                           max_workers=4):
+    os.makedirs(output_dir, exist_ok=True)
+
+    # 샷들을 연속 구간 묶음으로 나눠 스레드별로 처리 (OpenCV 디코딩/저장은 GIL을 놓으므로 병렬로 진행됨)
+    indexed_shots = list(enumerate(shot_ranges))
+    num_chunks = max(1, min(max_workers, len(indexed_shots)))
+    chunk_size = -(-len(indexed_shots) // num_chunks) if indexed_shots else 1
+    chunks = [indexed_shots[i:i + chunk_size] for i in range(0, len(indexed_shots), chunk_size)]
+    sampled_images = []
+    writes = []
+    # JPEG 인코딩/저장은 별도 writer 스레드에서 처리해 디코딩과 겹치게 함
+    with ThreadPoolExecutor(max_workers=FRAME_WRITE_WORKERS) as writer:
+        args = (output_dir, ssim_threshold, min_frame_gap, max_frames_per_shot, hw_decode, writer, writes)
+
+        if len(chunks) <= 1:
+            sampled_images = _extract_keyframes_shots(video_path, indexed_shots, *args)
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                for chunk_images in executor.map(lambda chunk: _extract_keyframes_shots(video_path, chunk, *args), chunks):
+                    sampled_images.extend(chunk_images)
+
+        for future in writes:
+            future.result()
+    return sampled_images
@@ -6,6 +6,7 @@
 
 import os
 import json
+import orjson
 import requests
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
@@ -398,7 +399,7 @@ class SceneGraphDBClient:
                 # 실제 node_id 생성: {video_unique_id}_{scene_id}_{node_type}_{orig_id}
                 actual_node_id = f"{video_unique_id}_{scene_id}_{node_type}_{original_node_id}"
                 
-                # 임베딩 벡터 가져오기
+                # 임베딩 벡터 가져오기 (numpy 배열이면 orjson이 리스트 변환 없이 직렬화)
                 embedding_vector = node_embeddings[i]
                 
                 # 임베딩 데이터 저장
@@ -409,7 +410,11 @@ class SceneGraphDBClient:
                 }
                 
                 # 임베딩 저장 API 호출 (직접 데이터베이스에 저장)
-                response = self.session.post(f"{self.db_api_base_url}/embeddings", json=embedding_data)
+                response = self.session.post(
+                    f"{self.db_api_base_url}/embeddings",
+                    data=orjson.dumps(embedding_data, option=orjson.OPT_SERIALIZE_NUMPY),
+                    headers={"Content-Type": "application/json"}
+                )
                 response.raise_for_status()
                 
                 print(f"  ✅ 임베딩 저장: {node_label} ({node_type}) - {actual_node_id}")
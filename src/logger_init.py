@@ -3,6 +3,9 @@ import os
 import logging
 from colorlog import ColoredFormatter
 
+# log 파일 경로별 FileHandler (여러 logger 이름이 같은 파일을 쓰더라도 파일은 한 번만 연다)
+_FILE_HANDLERS = {}
+
 def initialize_logger(log_name, log_level, log_dir):
     LOG_LEVELS = {
             "NOTSET": logging.NOTSET,
@@ -13,6 +16,14 @@ def initialize_logger(log_name, log_level, log_dir):
             "CRITICAL": logging.CRITICAL
         }
 
+    logger = logging.getLogger(log_name)
+    logger.setLevel(LOG_LEVELS[log_level.upper()])
+
+    # 이미 설정된 logger는 handler를 다시 만들지 않음
+    # (hasHandlers()는 부모(root) logger까지 보므로 root가 설정돼 있으면 설정을 건너뛰는 문제가 있었음)
+    if getattr(logger, "_mg_initialized", False):
+        return logger
+
     formatter = ColoredFormatter(
             "%(log_color)s[%(asctime)s] %(name)s - %(levelname)s - %(message)s",
             datefmt=None,
@@ -34,19 +45,18 @@ def initialize_logger(log_name, log_level, log_dir):
     # if not os.path.exists('./log'):
     #     os.makedirs('./log')
 
-    logger = logging.getLogger(log_name)
-    logger.setLevel(LOG_LEVELS[log_level.upper()])
-
-    if not logger.hasHandlers():
-        
-        stream_handler = logging.StreamHandler()
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    logger.addHandler(stream_handler)
 
+    file_handler = _FILE_HANDLERS.get(log_dir)
+    if file_handler is None:
         file_handler = logging.FileHandler(filename=log_dir)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        _FILE_HANDLERS[log_dir] = file_handler
+    logger.addHandler(file_handler)
 
+    logger._mg_initialized = True
     return logger
 
 def seg_logger(logger):
@@ -56,4 +66,6 @@ def seg_logger(logger):
 def get_logger():
     return LOGGER
 
-LOGGER = None
\ No newline at end of file
+# initialize_logger("media_graph", ...)가 설정하는 것과 같은 logger 객체이므로
+# 모듈 import 시점에 get_logger()로 바인딩해도 이후 설정이 그대로 반영됨
+LOGGER = logging.getLogger("media_graph")
\ No newline at end of file
@@ -1,33 +1,51 @@
+import os
+
+# API 서버는 모델 연산을 하지 않으므로 BLAS/OpenMP/tokenizers 스레드를 1개로 제한
+# (numpy/cv2 import 전에 설정해야 적용되며, 멀티 워커에서 워커 수 x 스레드 수만큼 코어를 나눠 쓰는 것을 방지)
+for _name, _value in (("OMP_NUM_THREADS", "1"), ("MKL_NUM_THREADS", "1"),
+                      ("OPENBLAS_NUM_THREADS", "1"), ("TOKENIZERS_PARALLELISM", "false")):
+    os.environ.setdefault(_name, _value)
+
 import logger_init
 import argparse
 import uvicorn
-import os
 import asyncio
 
 from contents_graph.utils import load_config
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
-from starlette_context.middleware import ContextMiddleware
-from api.router import request_logger, response_logger, GRAPH_ROUTER
+from starlette_context.middleware import RawContextMiddleware
+from api.router import RequestLoggerMiddleware, ResponseLoggerMiddleware, GRAPH_ROUTER
+# startup_event에서 사용하는 모듈은 이벤트 루프 밖(모듈 로드 시점)에서 미리 import
+from contents_graph.task_manager import task_manager
+from contents_graph.celery_app import celery_app, get_alive_worker_queues
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 def setup_app(server_name, args):
     # logger 초기화
     logger = logger_init.get_logger()
     
-    app.middleware('http')(request_logger)
-    app.middleware('http')(response_logger)
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-    app.add_middleware(ContextMiddleware)
+    app.state.config = load_config(args.config_file)
+    config = app.state.config
+
+    # add_middleware는 나중에 추가한 것이 바깥쪽에서 실행됨
+    # (context middleware는 가장 안쪽에 두어 CORS 등에서 먼저 끝나는 요청은 context 생성 비용을 내지 않도록 함)
+    # context plugin은 사용하지 않으므로 요청마다 plugin 처리 없이 빈 context만 생성
+    app.add_middleware(RawContextMiddleware, plugins=())
+    # CORS는 브라우저에서 직접 호출하는 배포에서만 설정의 origin 목록으로 활성화 (내부 전용 배포에서는 생략)
+    if config.get("ENABLE_CORS"):
+        app.add_middleware(
+            CORSMiddleware,
+            allow_origins=config.get("CORS_ALLOW_ORIGINS", []),
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+    app.add_middleware(ResponseLoggerMiddleware)
+    app.add_middleware(RequestLoggerMiddleware)
     logger.info(f'Start {server_name}')
     
-    app.state.config = load_config(args.config_file)
     if server_name == "media_graph":
         app.include_router(GRAPH_ROUTER) 
     else:
@@ -38,27 +56,32 @@ def setup_app(server_name, args):
 
 @app.on_event("startup")
 async def startup_event():
-    config = app.state.config  # 여기서 사용 가능
+    # setup_app에서 app.state에 저장한 설정 (load_config 캐시를 그대로 공유)
+    config = app.state.config
     logger = logger_init.get_logger()
     
-    # NAS 루트 경로 생성
+    # NAS 루트 경로 생성 (blocking syscall이므로 이벤트 루프 밖에서 실행)
     root_path = config["NAS_ROOT_PATH"]
-    os.makedirs(root_path, exist_ok=True)
-    
-    # 설정을 app.state에 저장 (context는 request cycle에서만 사용 가능)
-    app.state.config = config
+    await asyncio.to_thread(os.makedirs, root_path, exist_ok=True)
     
-    # Celery 연결 테스트
+    # Celery 연결 테스트 (동기 호출은 스레드에서 동시에 실행해 startup을 막지 않음)
     try:
-        from contents_graph.task_manager import task_manager
-        # Redis 연결 테스트
-        task_manager.redis_client.ping()
+        # Redis 연결 테스트 + Celery 브로커 연결 테스트 (워커 응답을 기다리는 broadcast 없이 연결만 확인)
+        await asyncio.gather(
+            asyncio.to_thread(task_manager.redis_client.ping),
+            asyncio.to_thread(lambda: celery_app.connection_for_write().ensure_connection(max_retries=1).release())
+        )
         logger.info("Redis connection successful")
-        
-        # Celery 브로커 연결 테스트
-        from contents_graph.celery_app import celery_app
-        celery_app.control.inspect().stats()
         logger.info("Celery broker connection successful")
+
+        # 라우팅된 큐마다 처리할 워커가 있는지 확인 (워커가 Redis에 남기는 생존 표시 키를 SCAN)
+        # (워커가 API보다 늦게 뜰 수 있으므로 경고만 남김)
+        alive_workers = await asyncio.to_thread(get_alive_worker_queues, task_manager.redis_client)
+        routed_queues = {route["queue"] for route in celery_app.conf.task_routes.values()}
+        active_queues = {queue for queues in alive_workers.values() for queue in queues}
+        missing_queues = routed_queues - active_queues
+        if missing_queues:
+            logger.warning(f"No Celery worker is consuming queue(s): {', '.join(sorted(missing_queues))}")
         
     except Exception as e:
         logger.error(f"Failed to connect to Redis or Celery broker: {e}")
@@ -66,6 +89,56 @@ async def startup_event():
     
     logger.info("Media Graph API server started with Celery backend")
 
+SERVER_NAME = "media_graph"
+
+# 멀티 워커 실행 시 각 워커 프로세스에 CLI 인자를 전달하기 위한 환경변수 이름
+_ARGS_ENV = {
+    "log_lev": "MEDIA_GRAPH_LOG_LEV",
+    "log_file": "MEDIA_GRAPH_LOG_FILE",
+    "config_file": "MEDIA_GRAPH_CONFIG_FILE",
+}
+
+# uvicorn 기본 워커 수 (2 * CPU + 1)
+DEFAULT_WORKERS = (os.cpu_count() or 1) * 2 + 1
+
+def uvicorn_options(config, workers):
+    """
+    uvicorn 공통 실행 옵션 (동시 연결 상한을 넘는 요청은 큐에 쌓지 않고 바로 503으로 응답)
+
+    Args:
+        config (dict): 서버 설정 (MAX_CONCURRENCY: 워커당 동시 연결 상한, 기본 128)
+        workers (int): uvicorn 워커 프로세스 수
+
+    Returns:
+        dict: uvicorn.run에 넘길 옵션
+    """
+    options = {
+        "loop": "uvloop",           # uvloop 이벤트 루프
+        "http": "httptools",        # httptools HTTP 파서
+        "backlog": 2048,            # listen 소켓 대기열 크기
+        "limit_concurrency": int(config.get("MAX_CONCURRENCY", 128)),
+        "timeout_keep_alive": 5,    # 유휴 keep-alive 연결 유지 시간 (초)
+    }
+    # 요청 수 제한으로 워커를 재시작하는 것은 죽은 워커를 다시 띄워주는 멀티 워커 모드에서만 사용
+    # (단일 프로세스에서는 제한에 도달하면 서버가 종료됨)
+    if workers > 1:
+        options["limit_max_requests"] = 10000
+    return options
+
+def init_logger(args):
+    logger_it = logger_init.initialize_logger(SERVER_NAME, args.log_lev, args.log_file)
+    logger_init.seg_logger(logger_it)
+    return logger_init.get_logger()
+
+def create_app():
+    """
+    uvicorn 멀티 워커용 app factory
+    각 워커 프로세스에서 main()이 환경변수로 넘겨준 인자로 logger와 app을 초기화합니다.
+    """
+    args = argparse.Namespace(**{name: os.environ[env] for name, env in _ARGS_ENV.items()})
+    init_logger(args)
+    return setup_app(SERVER_NAME, args)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--log_lev", type=str, default="INFO", help="NOTSET, DEBUG, INFO, WARNING, ERROR, CRITICAL")
@@ -73,24 +146,33 @@ def main():
     parser.add_argument("--config_file", type=str, default="/workspace/config/media-graph_config.json")
     parser.add_argument("--ip", type=str, default="0.0.0.0")
     parser.add_argument("--port", type=str, default="10102")
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("UVICORN_WORKERS", DEFAULT_WORKERS)),
+                        help="uvicorn worker process count (default: $UVICORN_WORKERS or 2 * CPU + 1)")
     args = parser.parse_args()
 
-    SERVER_NAME = "media_graph"
-    logger_it = logger_init.initialize_logger(SERVER_NAME, args.log_lev, args.log_file)
-    logger_init.seg_logger(logger_it)
-    logger = logger_init.get_logger()
+    logger = init_logger(args)
 
     logger.info(f'SERVER INFO')
     logger.info(f'- Adress: {args.ip}:{args.port}')
     logger.info(f'- Log: {args.log_file}')
     logger.info(f'- Config: {args.config_file}')
+    logger.info(f'- Workers: {args.workers}')
+
+    if args.workers > 1:
+        # 워커 프로세스마다 app을 새로 만들도록 import string + factory로 실행
+        # (태스크 상태는 Redis/Celery에 있으므로 워커 간 공유할 메모리 상태 없음)
+        for name, env in _ARGS_ENV.items():
+            os.environ[env] = str(getattr(args, name))
+        uvicorn.run("run:create_app", factory=True, workers=args.workers,
+                    host=args.ip, port=int(args.port), **uvicorn_options(load_config(args.config_file), args.workers))
+        return
 
     app = setup_app(SERVER_NAME, args)
     if app is None:
         logger.error('')
         exit(1)
 
-    uvicorn.run(app, host=args.ip, port=int(args.port))
+    uvicorn.run(app, host=args.ip, port=int(args.port), **uvicorn_options(app.state.config, args.workers))
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
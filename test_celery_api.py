@@ -2,122 +2,123 @@
 """
 Celery 기반 Media Graph API 테스트 스크립트
 """
-import requests
-import time
+import asyncio
+import httpx
 import json
 
 BASE_URL = "http://localhost:10103/api"
 
-def test_meta2graph():
-    """Meta-to-SceneGraph API 테스트"""
-    print("=== Testing Meta-to-SceneGraph API ===")
-    
-    # 테스트 데이터
-    test_data = {
-        "metadata": {
-            "title": "Test Video",
-            "description": "A test video for scene graph generation",
-            "duration": 120,
-            "genre": "action"
-        }
+# 상태 조회 시 서버에서 상태 변화까지 대기할 최대 시간 (초, 서버 MAX_LONG_POLL_WAIT 이하)
+LONG_POLL_WAIT = 30
+
+# 테스트 요청 본문 (한 번만 직렬화해 두고 요청마다 같은 bytes를 전송)
+JSON_HEADERS = {"Content-Type": "application/json"}
+META2GRAPH_TEST_PAYLOAD = json.dumps({
+    "metadata": {
+        "title": "Test Video",
+        "description": "A test video for scene graph generation",
+        "duration": 120,
+        "genre": "action"
     }
-    
-    # 작업 제출
-    response = requests.post(f"{BASE_URL}/v1/meta-to-scenegraph", json=test_data)
-    print(f"Submit response: {response.status_code}")
-    
-    if response.status_code == 200:
-        result = response.json()
-        job_id = result["jobid"]
-        print(f"Job ID: {job_id}")
-        
-        # 작업 상태 폴링
-        while True:
-            status_response = requests.get(f"{BASE_URL}/v1/meta-to-scenegraph/{job_id}")
-            if status_response.status_code == 200:
-                status_data = status_response.json()
-                print(f"Status: {status_data['status']}, Progress: {status_data.get('progress', 0)}%")
-                
-                if status_data['status'] in [202, 203, 204]:  # SUCCESS, FAILURE, REVOKED
-                    if status_data.get('result'):
-                        print(f"Result: {json.dumps(status_data['result'], indent=2)}")
-                    break
-                    
-                time.sleep(2)
-            else:
-                print(f"Error checking status: {status_response.status_code}")
-                break
-    else:
+}, ensure_ascii=False).encode()
+RETRIEVAL_TEST_PAYLOAD = json.dumps({
+    "query": "Find action scenes with cars",
+    "tau": 0.3,
+    "top_k": 5
+}, ensure_ascii=False).encode()
+
+def create_client():
+    """제출/상태 조회 전체에서 재사용하는 비동기 HTTP 클라이언트 (keep-alive 커넥션 풀)"""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=httpx.Timeout(10.0),
+        limits=httpx.Limits(max_connections=16, max_keepalive_connections=16)
+    )
+
+async def wait_for_job(client, status_path):
+    """
+    ?wait=&last_status= long-polling으로 작업이 끝날 때까지 상태를 조회합니다.
+    고정 간격 sleep 없이 서버가 상태 변화 시점에 바로 응답하므로 변화가 있을 때만 요청이 오갑니다.
+    """
+    last_status = None
+    while True:
+        params = {"wait": LONG_POLL_WAIT}
+        if last_status is not None:
+            params["last_status"] = last_status
+        status_response = await client.get(status_path, params=params, timeout=LONG_POLL_WAIT + 10)
+        if status_response.status_code != 200:
+            print(f"Error checking status: {status_response.status_code}")
+            return None
+
+        status_data = status_response.json()
+        print(f"[{status_path}] Status: {status_data['status']}, Progress: {status_data.get('progress', 0)}%")
+
+        if status_data['status'] in [202, 203, 204]:  # SUCCESS, FAILURE, REVOKED
+            if status_data.get('result'):
+                print(f"Result: {json.dumps(status_data['result'], indent=2)}")
+            return status_data
+
+        last_status = status_data['status']
+
+async def submit_and_wait(client, path, payload):
+    """작업을 제출(payload: 직렬화된 JSON bytes)하고 종료될 때까지 상태를 기다림"""
+    response = await client.post(path, content=payload, headers=JSON_HEADERS)
+    print(f"Submit response ({path}): {response.status_code}")
+
+    if response.status_code != 200:
         print(f"Error submitting job: {response.text}")
+        return None
+
+    job_id = response.json()["jobid"]
+    print(f"Job ID: {job_id}")
+
+    # 작업 상태 대기 (long-polling)
+    return await wait_for_job(client, f"{path}/{job_id}")
 
-def test_retrieval_graph():
+async def test_meta2graph(client):
+    """Meta-to-SceneGraph API 테스트"""
+    print("=== Testing Meta-to-SceneGraph API ===")
+    return await submit_and_wait(client, "/v1/meta-to-scenegraph", META2GRAPH_TEST_PAYLOAD)
+
+async def test_retrieval_graph(client):
     """Retrieval Graph API 테스트"""
-    print("\n=== Testing Retrieval Graph API ===")
-    
-    # 테스트 데이터
-    test_data = {
-        "query": "Find action scenes with cars",
-        "tau": 0.3,
-        "top_k": 5
-    }
-    
-    # 작업 제출
-    response = requests.post(f"{BASE_URL}/v1/retrieve-scenegraph", json=test_data)
-    print(f"Submit response: {response.status_code}")
-    
-    if response.status_code == 200:
-        result = response.json()
-        job_id = result["jobid"]
-        print(f"Job ID: {job_id}")
-        
-        # 작업 상태 폴링
-        while True:
-            status_response = requests.get(f"{BASE_URL}/v1/retrieve-scenegraph/{job_id}")
-            if status_response.status_code == 200:
-                status_data = status_response.json()
-                print(f"Status: {status_data['status']}, Progress: {status_data.get('progress', 0)}%")
-                
-                if status_data['status'] in [202, 203, 204]:  # SUCCESS, FAILURE, REVOKED
-                    if status_data.get('result'):
-                        print(f"Result: {json.dumps(status_data['result'], indent=2)}")
-                    break
-                    
-                time.sleep(2)
-            else:
-                print(f"Error checking status: {status_response.status_code}")
-                break
-    else:
-        print(f"Error submitting job: {response.text}")
+    print("=== Testing Retrieval Graph API ===")
+    return await submit_and_wait(client, "/v1/retrieve-scenegraph", RETRIEVAL_TEST_PAYLOAD)
 
-def test_health_check():
+async def test_health_check(client):
     """API 서버 상태 확인"""
     print("=== Testing API Health ===")
-    
+
     try:
         # 간단한 GET 요청으로 서버 상태 확인
-        response = requests.get(f"{BASE_URL}/v1/meta-to-scenegraph/nonexistent", timeout=5)
+        response = await client.get("/v1/meta-to-scenegraph/nonexistent", timeout=5)
         if response.status_code == 404:
             print("✓ API server is running")
             return True
         else:
             print(f"✗ Unexpected response: {response.status_code}")
             return False
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"✗ API server is not accessible: {e}")
         return False
 
+async def main_async():
+    async with create_client() as client:
+        # API 서버 상태 확인
+        if not await test_health_check(client):
+            print("\nPlease make sure the API server is running:")
+            print("  ./docker_launch.sh -r")
+            return False
+
+        # API 테스트를 동시에 실행 (제출/상태 대기가 같은 커넥션 풀을 공유)
+        await asyncio.gather(test_meta2graph(client), test_retrieval_graph(client))
+        return True
+
 if __name__ == "__main__":
     print("Media Graph API Test Script")
     print("=" * 50)
-    
-    # API 서버 상태 확인
-    if not test_health_check():
-        print("\nPlease make sure the API server is running:")
-        print("  ./docker_launch.sh -r")
+
+    if not asyncio.run(main_async()):
         exit(1)
-    
-    # API 테스트 실행
-    test_meta2graph()
-    test_retrieval_graph()
-    
+
     print("\n=== Test completed ===")